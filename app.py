@@ -1,148 +1,56 @@
+from core.startup import mark
 import tkinter as tk
 import keyboard
-from core.capture import grab_region
-from core.yolo_bubble import detect_bubbles, sort_bubbles_for_japanese
-from core.ocr import extract_text_from_bubbles, ocr_single_bubble
-from core.translate import translate_batch
-from core.ui_overlay import destroy_status_overlay, show_overlay, show_status_overlay
+from core import config
+from core.metrics import tracer
+from core.models import warm_up_async
+from core.ocr import ocr_models
+from core.yolo_bubble import detector_models
+from core.pipeline import OcrPipeline
+from core.scheduler import InferenceScheduler
+from core.model_client import ModelClient
+from core.frame_watch import FrameWatcher
+from core.ui_overlay import OverlayCompositor
 from core.logger import setup_logger
 import logging
-import cv2
-from core.ui_pillow_bubble import draw_bubbles_on_canvas
-import time
-import numpy as np
-from typing import Tuple
 
 setup_logger()
+mark("imports done")
 
-def main():
-    region = {"top": 128, "left": 575, "width": 768, "height": 864}
-    block_rects = []
-    bubbles_visible = True
-    bubble_canvas_items = []
+MAGENTA = "#FF00FF"
 
-    def toggle_bubbles():
-        nonlocal bubbles_visible, block_rects, bubble_canvas_items
-        bubbles_visible = not bubbles_visible
-        if not bubbles_visible:
-            for r in block_rects:
-                r.destroy()
-            block_rects.clear()
-            for item in bubble_canvas_items:
-                bubble_canvas.delete(item)
-            bubble_canvas_items.clear()
-            logging.info("Bubbles hidden")
-        else:
-            logging.info("Bubbles toggle ON — will reappear after next OCR cycle")
 
-    def run_ocr_cycle():
-        nonlocal block_rects
-        nonlocal bubble_canvas_items
-        timings = {}
-        t0 = time.perf_counter()
-        logging.info("Starting OCR cycle")
-
-        for r in block_rects:
-            r.destroy()
-        block_rects.clear()
-
-        destroy_status_overlay()
-        show_status_overlay(root, region, "Getting image...")
-
-        img = grab_region(region)
-        t1 = time.perf_counter()
-        timings['grab_region'] = t1 - t0
-
-        destroy_status_overlay()
-        show_status_overlay(root, region, "Getting bubbles...")
-
-        bubble_crops = detect_bubbles(img)
-        bubble_crops = sort_bubbles_for_japanese(bubble_crops)
-        logging.info(f"Detected {len(bubble_crops)} bubbles")
-        # logging.debug(f"Bubble crops: {bubble_crops}")
-        if not bubble_crops:
-            logging.info("No bubbles detected. Skipping OCR.")
-            show_status_overlay(root, region, "No bubbles found.")
-            return
-        
-        t2 = time.perf_counter()
-        timings['detect_bubbles'] = t2 - t1
-
-        destroy_status_overlay()
-        show_status_overlay(root, region, "Getting texts...")
-        raw_blocks = []
-        for crop, offset in bubble_crops:
-            raw_blocks.extend(extract_text_from_bubbles([(crop, offset)]))
-
-        if not raw_blocks:
-            logging.info("No OCR text detected in any bubble. Skipping translation.")
-            show_status_overlay(root, region, "No text found.")
-            return
-        logging.info(f"OCR extracted {len(raw_blocks)} bubbles")
-
-        logging.debug(f"Raw OCR blocks: {raw_blocks}")
-        blocks = []
-        for text, (x1, y1, x2, y2), conf, angle in raw_blocks:
-            blocks.append((text, (x1, y1, x2, y2), conf, angle))
-        logging.debug(f"OCR blocks: {blocks}")
-
-        # Show OCR text first (no translation yet)
-        block_rects = show_overlay(root, region, blocks, show_translation=False)
-
-        t3 = time.perf_counter()
-        timings['OCR - time to get text from image'] = t3 - t2
-
-        destroy_status_overlay()
-        show_status_overlay(root, region, "Getting translations...")
-        # Collect just the OCR texts
-        texts = [b[0] for b in blocks]
-        translations = translate_batch(texts)
-        logging.info("Translation complete")
-
-        # Clear any prior overlays
-        if blocks and translations:
-            bubble_canvas_items = draw_bubbles_on_canvas(bubble_canvas, blocks, translations, region)
-
-        for r in block_rects:
-            r.destroy()
-        block_rects = show_overlay(root, region, blocks, translations, show_translation=True)
-        logging.info("Overlay updated")
-
-        t4 = time.perf_counter()
-        timings['time to get translations and show on screen'] = t4 - t3
-
-        logging.info("Timings per stage: " + ", ".join(f"{k}={v*1000:.1f}ms" for k,v in timings.items()))
-
-        show_status_overlay(root, region, "Complete!")
+def add_region(root, region: dict, inference=None):
+    """One capture region: its overlay window, pipeline and page watcher."""
 
-    # Tkinter root window
-    root = tk.Tk()
-    root.overrideredirect(True)
-    root.attributes("-topmost", True)
-    root.attributes("-transparentcolor", "white")
-    root.configure(bg="white")
+    def on_status(message, auto_hide_ms=None):
+        compositor.set_status(message, auto_hide_ms)
 
-    region_rectangle = tk.Toplevel(root)
-    region_rectangle.overrideredirect(True)
-    region_rectangle.attributes("-topmost", True)
-    region_rectangle.geometry(f"{region['width']}x{region['height']}+{region['left']}+{region['top']}")
-    try:
-        region_rectangle.attributes("-transparentcolor", "cyan")
-        canvas = tk.Canvas(region_rectangle, width=region['width'], height=region['height'], bg='cyan', highlightthickness=0)
-    except Exception:
-        canvas = tk.Canvas(region_rectangle, width=region['width'], height=region['height'], bg='white', highlightthickness=0)
-    canvas.pack(fill="both", expand=True)
-    canvas.create_rectangle(2, 2, region['width']-2, region['height']-2, outline="red", width=4)
-    region_rectangle.lift(root)
-
-    # after you draw the red capture rectangle in main():
+    def on_blocks(blocks):
+        # Show OCR block outlines first (no translation yet)
+        compositor.set_blocks(blocks)
+
+    def on_result(blocks, translations):
+        compositor.set_blocks(blocks)
+        compositor.set_bubbles(blocks, translations)
+
+    def on_partial(blocks, translations):
+        # streaming: bubbles appear one by one; the outlines of the rest stay up until on_result
+        compositor.set_bubbles(blocks, translations)
+
+    def on_cycle_end():
+        # runs after the final render and status: paint them now, then let the watcher
+        # take the next poll, with our overlay on it, as the processed page
+        overlay.update_idletasks()
+        watcher.rebaseline()
+        logging.info(f"Overlay render time this cycle ({region.get('name', '')}): {compositor.take_render_time()*1000:.1f}ms")
+
+    # One persistent overlay window over the capture region; everything is drawn on its canvas
     overlay = tk.Toplevel(root)
     overlay.overrideredirect(True)
     overlay.attributes("-topmost", True)
     overlay.geometry(f"{region['width']}x{region['height']}+{region['left']}+{region['top']}")
 
-    MAGENTA = "#FF00FF"
-
     # Tell Tkinter: treat MAGENTA pixels as fully transparent
     overlay.attributes("-transparentcolor", MAGENTA)
 
@@ -155,13 +63,79 @@ def main():
         highlightthickness=0
     )
     bubble_canvas.pack(fill="both", expand=True)
-    bubble_canvas.create_oval(0, 0, 5, 5, fill='red')
+    compositor = OverlayCompositor(bubble_canvas, region)
+
+    pipeline = OcrPipeline(root, region, on_status, on_blocks, on_result, on_cycle_end, on_partial, inference)
+    pipeline.start()
+    watcher = FrameWatcher(region, pipeline.trigger)
+    return pipeline, watcher, compositor
 
-    keyboard.add_hotkey('f8', run_ocr_cycle)
-    keyboard.add_hotkey('f9', toggle_bubbles)
-    keyboard.add_hotkey('esc', root.destroy)
-    logging.info("Application started. Press F8 to run OCR, ESC to exit.")
-    root.mainloop()
+
+def main():
+    bubbles_visible = True
+
+    def toggle_bubbles():
+        nonlocal bubbles_visible
+        bubbles_visible = not bubbles_visible
+        if not bubbles_visible:
+            for compositor in compositors:
+                compositor.clear()
+            logging.info("Bubbles hidden")
+        else:
+            logging.info("Bubbles toggle ON — will reappear after next OCR cycle")
+
+    # Tkinter root window
+    root = tk.Tk()
+    root.overrideredirect(True)
+    root.attributes("-topmost", True)
+    root.attributes("-transparentcolor", "white")
+    root.configure(bg="white")
+
+    # several regions share one detector/OCR worker instead of calling the models from each pipeline;
+    # with MODEL_SERVER the models live in model_server.py and each region connects to it
+    scheduler = InferenceScheduler() if len(config.REGIONS) > 1 and not config.MODEL_SERVER else None
+    if scheduler is not None:
+        scheduler.start()
+    pipelines, watchers, compositors, clients = [], [], [], []
+    for index, region in enumerate(config.REGIONS):
+        if config.MODEL_SERVER:
+            inference = ModelClient()
+            clients.append(inference)
+        elif scheduler is not None:
+            inference = scheduler.client(region.get("name", str(index)))
+        else:
+            inference = None
+        pipeline, watcher, compositor = add_region(root, region, inference)
+        pipelines.append(pipeline)
+        watchers.append(watcher)
+        compositors.append(compositor)
+
+    if config.WARM_UP_MODELS and not config.MODEL_SERVER:
+        # loads and runs the models while the windows come up; a cycle started meanwhile waits
+        # for each model's load and then takes turns with the warm-up on it (see models.use)
+        warm_up_async(detector_models() + ocr_models())
+
+    # keyboard callbacks run on the hook thread; only the pipelines may touch Tk from there
+    def translate_all():
+        for pipeline, watcher in zip(pipelines, watchers):
+            watcher.suspend()  # the cycle's own repaint is not a page change
+            pipeline.trigger()
+
+    keyboard.add_hotkey('f8', translate_all)
+    keyboard.add_hotkey('f7', lambda: [w.toggle() for w in watchers])
+    keyboard.add_hotkey('f9', lambda: pipelines[0].ui(toggle_bubbles))
+    keyboard.add_hotkey('f10', tracer.profile_next)
+    keyboard.add_hotkey('shift+f10', tracer.export)
+    keyboard.add_hotkey('esc', lambda: pipelines[0].ui(root.destroy))
+    logging.info(f"Application started with {len(pipelines)} region(s). "
+                 "Press F8 to run OCR, F7 to toggle auto-translate, ESC to exit.")
+    root.after_idle(mark, "windows ready")
+    try:
+        root.mainloop()
+    finally:
+        # unlinks their shared-memory blocks, which would outlive the app otherwise
+        for client in clients:
+            client.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,59 @@
+# batch_translate.py
+"""
+Pre-translate a whole chapter: a folder of pages or a .cbz/.zip archive in,
+typeset pages out (folder, or .cbz when OUTPUT ends with .cbz).
+
+    python batch_translate.py chapter.cbz -o chapter_en.cbz --workers 4
+    python batch_translate.py pages/ -o pages_en/ --format jpg --stub-translator
+    python batch_translate.py chapter.cbz -o chapter_en.cbz --server   # models in model_server.py
+"""
+import argparse
+import logging
+import time
+
+from core.batch import WORKERS, PageWriter, translate_pages
+from core.logger import setup_logger
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="folder of page images or .cbz/.zip archive")
+    parser.add_argument("-o", "--output", required=True, help="output folder or .cbz file")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="worker processes, each loads the models once")
+    parser.add_argument("--format", choices=("png", "jpg", "webp"), default="png")
+    parser.add_argument("--device", help="run every model on this device (\"cpu\"); default comes from core.config")
+    parser.add_argument("--server", nargs="?", const=True,
+                        help="use the models of a running model_server.py (at this address, default its local one)")
+    parser.add_argument("--stub-translator", action="store_true", help="offline translator instead of Google")
+    args = parser.parse_args()
+
+    setup_logger()
+    overrides = {}
+    if args.device:
+        overrides["OCR_DEVICE"] = args.device
+        overrides["YOLO_DEVICE"] = args.device
+    if args.server:
+        overrides["MODEL_SERVER"] = args.server
+
+    writer = PageWriter(args.output)
+    t0 = time.perf_counter()
+    pages = bubbles = failed = 0
+    try:
+        for name, data, stats in translate_pages(
+            args.source, args.workers, args.format, args.stub_translator, overrides
+        ):
+            writer.write(name, data)
+            pages += 1
+            bubbles += stats["bubbles"]
+            failed += stats["error"] is not None
+            logging.info(f"{name}: {stats['blocks']}/{stats['bubbles']} bubbles translated in {stats['seconds']:.1f}s")
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - t0
+    print(f"{pages} pages ({failed} failed), {bubbles} bubbles in {elapsed:.1f}s "
+          f"= {pages / elapsed if elapsed else 0:.2f} pages/s with {args.workers} workers -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# benchmarks/capture_bench.py
+"""
+Per-frame capture cost at a fixed polling rate: the persistent CaptureSession
+(zero-copy BGR view) against the old per-call mss + np.array + cvtColor path.
+
+    python -m benchmarks.capture_bench --fps 30 --seconds 3 --left 575 --top 128 --width 768 --height 864
+"""
+import argparse
+import time
+
+import cv2
+import mss
+import numpy as np
+
+from core.capture import CaptureSession
+
+
+def legacy_grab(region: dict) -> np.ndarray:
+    with mss.mss() as sct:
+        frame = sct.grab(region)
+    return cv2.cvtColor(np.array(frame), cv2.COLOR_BGRA2RGB)
+
+
+def run(name: str, grab, fps: float, seconds: float) -> None:
+    interval = 1.0 / fps
+    samples = []
+    start = time.perf_counter()
+    next_frame = start
+    while time.perf_counter() - start < seconds:
+        t0 = time.perf_counter()
+        grab()
+        samples.append(time.perf_counter() - t0)
+        next_frame += interval
+        delay = next_frame - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    elapsed = time.perf_counter() - start
+    ms = np.array(samples) * 1000
+    print(f"{name:<10} frames={len(samples):4d}  achieved={len(samples) / elapsed:5.1f} fps  "
+          f"mean={ms.mean():6.2f} ms  p95={np.percentile(ms, 95):6.2f} ms  max={ms.max():6.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--left", type=int, default=575)
+    parser.add_argument("--top", type=int, default=128)
+    parser.add_argument("--width", type=int, default=768)
+    parser.add_argument("--height", type=int, default=864)
+    parser.add_argument("--target-width", type=int, default=None, help="also resize in the session path")
+    args = parser.parse_args()
+
+    region = {"top": args.top, "left": args.left, "width": args.width, "height": args.height}
+    session = CaptureSession()
+    run("legacy", lambda: legacy_grab(region), args.fps, args.seconds)
+    run("session", lambda: session.grab(region, args.target_width), args.fps, args.seconds)
+    session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# benchmarks/detector_bench.py
+"""
+Bubble detection latency per backend, image size and batch size: the .pt
+model through Ultralytics against the exported ONNX model on onnxruntime.
+Box counts are compared with the first backend as a sanity check.
+
+    python -m benchmarks.detector_bench pages/ --export                # write the .onnx first
+    python -m benchmarks.detector_bench pages/ --backends ultralytics onnx --imgsz 640 512 --batch 1 4
+"""
+import argparse
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+from core import config, models
+from core.detector import DETECTORS, export_onnx
+
+
+def load_pages(folder: str) -> list:
+    paths = sorted(p for p in glob.glob(os.path.join(folder, "*")) if p.lower().endswith((".png", ".jpg", ".jpeg", ".webp")))
+    pages = [cv2.imread(p) for p in paths]
+    return [p for p in pages if p is not None]
+
+
+def run(detector, pages: list, batch: int, repeat: int) -> tuple:
+    """Per-image milliseconds over `repeat` passes, and the boxes of the last pass."""
+    chunks = [pages[i:i + batch] for i in range(0, len(pages), batch)]
+    detector.predict_batch(chunks[0])  # warm-up
+    per_image, boxes = [], []
+    for _ in range(repeat):
+        boxes = []
+        for chunk in chunks:
+            t0 = time.perf_counter()
+            boxes.extend(detector.predict_batch(chunk))
+            per_image.extend([(time.perf_counter() - t0) * 1000 / len(chunk)] * len(chunk))
+    return np.array(per_image), boxes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pages", help="folder of page or screen-capture images")
+    parser.add_argument("--backends", nargs="+", choices=tuple(DETECTORS), default=list(DETECTORS))
+    parser.add_argument("--imgsz", nargs="+", type=int, default=[config.DETECT_IMGSZ])
+    parser.add_argument("--batch", nargs="+", type=int, default=[1])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--device", help="Ultralytics device for the .pt backend, e.g. cpu")
+    parser.add_argument("--export", action="store_true", help="export the .pt model to ONNX before measuring")
+    args = parser.parse_args()
+
+    if args.device:
+        config.YOLO_DEVICE = args.device
+    if args.export:
+        config.YOLO_ONNX_PATH = export_onnx()
+
+    pages = load_pages(args.pages)
+    if not pages:
+        parser.error(f"no images found in {args.pages}")
+    print(f"{len(pages)} images, {np.mean([p.shape[1] for p in pages]):.0f} px mean width")
+
+    t0 = time.perf_counter()
+    for backend in args.backends:
+        for name in DETECTORS[backend]().model_names():
+            models.get(name)
+    print(f"model load {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+    print(f"{'backend':<12}{'imgsz':>6}{'batch':>6}{'p50 ms':>9}{'p95 ms':>9}{'img/s':>8}{'boxes':>7}{'Δ boxes':>9}")
+    reference = None
+    for imgsz in args.imgsz:
+        for backend in args.backends:
+            for batch in args.batch:
+                ms, boxes = run(DETECTORS[backend](imgsz=imgsz), pages, batch, args.repeat)
+                counts = np.array([len(b) for b in boxes])
+                if reference is None:
+                    reference = counts
+                print(f"{backend:<12}{imgsz:>6}{batch:>6}{np.percentile(ms, 50):>9.1f}{np.percentile(ms, 95):>9.1f}"
+                      f"{1000 / ms.mean():>8.1f}{counts.sum():>7}{np.abs(counts - reference).sum():>9}")
+
+
+if __name__ == "__main__":
+    main()
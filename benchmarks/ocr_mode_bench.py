@@ -0,0 +1,79 @@
+# benchmarks/ocr_mode_bench.py
+"""
+OCR stage time per mode on saved pages: per-crop ("batch", "per_bubble",
+"rec_only") vs. one "full_page" pass with lines assigned to bubbles.
+Bubbles are detected once per page, so only the OCR stage is compared.
+Pages with at least --dense bubbles are also summarized separately.
+
+    python -m benchmarks.ocr_mode_bench pages/ --modes batch full_page --repeat 3
+"""
+import argparse
+import difflib
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+from core.ocr import extract_text_from_bubbles, ocr_models
+from core.yolo_bubble import detect_bubbles, detector_models, sort_bubbles_for_japanese
+from core import models
+
+MODES = ("batch", "per_bubble", "rec_only", "full_page")
+
+
+def load_pages(folder: str) -> list:
+    paths = sorted(p for p in glob.glob(os.path.join(folder, "*")) if p.lower().endswith((".png", ".jpg", ".jpeg", ".webp")))
+    pages = [(os.path.basename(p), cv2.imread(p)) for p in paths]
+    return [(name, img) for name, img in pages if img is not None]
+
+
+def agreement(a: list, b: list) -> float:
+    """Text similarity of two block lists (both are in right-to-left bubble order)."""
+    return difflib.SequenceMatcher(None, "".join(x[0] for x in a), "".join(x[0] for x in b)).ratio()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pages", help="folder of page images")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=["batch", "full_page"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--dense", type=int, default=8, help="bubbles per page counted as dense")
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages)
+    if not pages:
+        parser.error(f"no images found in {args.pages}")
+
+    models.warm_up(detector_models() + tuple({n for m in args.modes for n in ocr_models(m)}))
+    detected = [(name, img, sort_bubbles_for_japanese(detect_bubbles(img))) for name, img in pages]
+    detected = [d for d in detected if d[2]]
+    print(f"{len(detected)} pages with bubbles, "
+          f"{np.mean([len(b) for _, _, b in detected]):.1f} bubbles/page")
+
+    times = {mode: [] for mode in args.modes}
+    blocks = {mode: [] for mode in args.modes}
+    for mode in args.modes:
+        for _, img, bubbles in detected:
+            extract_text_from_bubbles(bubbles, mode, frame=img)  # warm-up for this page size
+            t0 = time.perf_counter()
+            for _ in range(args.repeat):
+                result = extract_text_from_bubbles(bubbles, mode, frame=img)
+            times[mode].append((time.perf_counter() - t0) / args.repeat * 1000)
+            blocks[mode].append(result)
+
+    dense = np.array([len(b) >= args.dense for _, _, b in detected])
+    base = args.modes[0]
+    print(f"{'mode':<12}{'all p50 ms':>12}{'all mean ms':>13}{'dense mean ms':>15}{'blocks':>8}{'vs ' + base:>10}")
+    for mode in args.modes:
+        ms = np.array(times[mode])
+        dense_ms = f"{ms[dense].mean():.1f}" if dense.any() else "-"
+        agree = np.mean([agreement(a, b) for a, b in zip(blocks[base], blocks[mode])])
+        print(f"{mode:<12}{np.percentile(ms, 50):>12.1f}{ms.mean():>13.1f}{dense_ms:>15}"
+              f"{sum(len(b) for b in blocks[mode]):>8}{agree:>10.1%}")
+    print(f"{int(dense.sum())} dense pages (>= {args.dense} bubbles)")
+
+
+if __name__ == "__main__":
+    main()
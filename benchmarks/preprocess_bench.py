@@ -0,0 +1,84 @@
+# benchmarks/preprocess_bench.py
+"""
+Cost of each preprocessing profile, serial vs. the parallel preprocess_crops,
+and optionally its OCR effect relative to the raw crop.
+
+    python -m benchmarks.preprocess_bench                      # synthetic crops
+    python -m benchmarks.preprocess_bench --crops debug/ --ocr  # saved bubble crops + PaddleOCR
+"""
+import argparse
+import difflib
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+from core.preprocess import PROFILES, preprocess_crop, preprocess_crops
+
+
+def load_crops(folder: str, count: int) -> list:
+    if folder:
+        paths = sorted(p for p in glob.glob(os.path.join(folder, "*")) if p.lower().endswith((".png", ".jpg", ".jpeg", ".webp")))
+        crops = [cv2.imread(p) for p in paths]
+        return [c for c in crops if c is not None]
+    rng = np.random.default_rng(0)
+    crops = []
+    for _ in range(count):
+        h, w = rng.integers(80, 320, size=2)
+        crop = np.full((h, w, 3), 255, np.uint8)
+        for _ in range(rng.integers(2, 6)):
+            x = int(rng.integers(5, max(6, w - 20)))
+            cv2.line(crop, (x, 10), (x, h - 10), (0, 0, 0), 2)
+        crops.append(crop)
+    return crops
+
+
+def time_it(fn, repeat: int) -> float:
+    fn()  # warm-up: thread pool, per-thread CLAHE and buffers
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat
+
+
+def ocr_summary(crops: list, profile: str) -> tuple:
+    from core.models import get_ocr
+    texts, scores = [], []
+    for img, _ in preprocess_crops(crops, profile):
+        res = get_ocr().predict(img)
+        r = res[0] if res else {}
+        texts.append("".join(r.get("rec_texts", [])))
+        scores.extend(r.get("rec_scores", []))
+    return texts, (float(np.mean(scores)) if scores else 0.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--crops", help="folder of bubble crop images (default: synthetic)")
+    parser.add_argument("--count", type=int, default=16, help="number of synthetic crops")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--ocr", action="store_true", help="also run PaddleOCR and compare with the raw crop")
+    args = parser.parse_args()
+
+    crops = load_crops(args.crops, args.count)
+    print(f"{len(crops)} crops")
+
+    raw_texts = None
+    if args.ocr:
+        raw_texts, raw_conf = ocr_summary(crops, "raw")
+
+    for profile in PROFILES:
+        serial = time_it(lambda: [preprocess_crop(c, profile) for c in crops], args.repeat)
+        parallel = time_it(lambda: preprocess_crops(crops, profile), args.repeat)
+        line = f"{profile:<6} serial={serial*1000:7.2f} ms  parallel={parallel*1000:7.2f} ms  per crop={parallel*1000/len(crops):6.3f} ms"
+        if args.ocr:
+            texts, conf = ocr_summary(crops, profile)
+            agreement = np.mean([difflib.SequenceMatcher(None, a, b).ratio() for a, b in zip(raw_texts, texts)])
+            line += f"  mean conf={conf:.3f}  text agreement with raw={agreement:.1%}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# benchmarks/translate_bench.py
+"""
+Offline throughput benchmark for the translation engine.
+
+    python -m benchmarks.translate_bench --texts 40 --latency 0.2 --workers 1 4 8
+
+With --pages it instead feeds page-like cycles (a few repeated interjections
+among longer lines) through the engine with and without packing, and reports
+backend requests per page; --merge-every makes the stub reflow lines so the
+per-text fallback is exercised too.
+
+    python -m benchmarks.translate_bench --pages 20 --bubbles 12 --merge-every 5
+"""
+import argparse
+import random
+import time
+
+from core.translation_engine import PACK_MAX_SIZE, StubBackend, TranslationEngine
+
+INTERJECTIONS = ["えっ", "はあ？", "ドン", "…", "くっ"]
+
+
+def run(texts: int, latency: float, workers: int, rate: float, fail_every: int) -> dict:
+    backend = StubBackend(latency=latency, fail_every=fail_every)
+    engine = TranslationEngine(backend, max_workers=workers, rate_per_sec=rate, burst=workers, backoff=0.01,
+                               pack_size=0)
+    inputs = [f"テキスト{i}" for i in range(texts)]
+
+    t0 = time.perf_counter()
+    results = engine.translate_many(inputs)
+    elapsed = time.perf_counter() - t0
+    engine.shutdown()
+
+    assert results == [f"{backend.prefix}{t}" for t in inputs], "results out of order or missing"
+    return {"workers": workers, "seconds": elapsed, "texts_per_sec": texts / elapsed, "requests": backend.calls}
+
+
+def make_pages(pages: int, bubbles: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    result = []
+    for p in range(pages):
+        page = []
+        for b in range(bubbles):
+            if rng.random() < 0.3:
+                page.append(rng.choice(INTERJECTIONS))
+            else:
+                page.append(f"ページ{p}の吹き出し{b}" + "。それで" * rng.randint(0, 6))
+        result.append(page)
+    return result
+
+
+def run_pages(pages: list, latency: float, workers: int, pack_size: int, merge_every: int) -> dict:
+    backend = StubBackend(latency=latency, merge_every=merge_every)
+    engine = TranslationEngine(backend, max_workers=workers, rate_per_sec=0, pack_size=pack_size)
+
+    t0 = time.perf_counter()
+    for page in pages:
+        results = engine.translate_many(page)
+        assert results == [f"{backend.prefix}{t}" for t in page], "results out of order or missing"
+    elapsed = time.perf_counter() - t0
+    engine.shutdown()
+    return {"pack_size": pack_size, "ms_per_page": elapsed * 1000 / len(pages),
+            "requests_per_page": backend.calls / len(pages)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.2, help="simulated round-trip in seconds")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--rate", type=float, default=0, help="requests/sec limit, 0 = unlimited")
+    parser.add_argument("--fail-every", type=int, default=0, help="make every Nth stub call fail")
+    parser.add_argument("--pages", type=int, default=0, help="run the per-page packing comparison instead")
+    parser.add_argument("--bubbles", type=int, default=12, help="bubbles per page for --pages")
+    parser.add_argument("--merge-every", type=int, default=0, help="make every Nth packed stub call lose its line breaks")
+    args = parser.parse_args()
+
+    if args.pages:
+        pages = make_pages(args.pages, args.bubbles)
+        print(f"{args.pages} pages, {args.bubbles} bubbles, {sum(len(set(p)) for p in pages) / args.pages:.1f} distinct per page")
+        for workers in args.workers:
+            for pack_size in (0, PACK_MAX_SIZE):
+                r = run_pages(pages, args.latency, workers, pack_size, args.merge_every)
+                print(f"workers={workers:>3}  pack_size={r['pack_size']:>5}  {r['ms_per_page']:8.1f} ms/page  "
+                      f"requests/page={r['requests_per_page']:.2f}")
+        return
+
+    for workers in args.workers:
+        r = run(args.texts, args.latency, workers, args.rate, args.fail_every)
+        print(f"workers={r['workers']:>3}  {r['seconds']*1000:8.1f} ms  "
+              f"{r['texts_per_sec']:7.1f} texts/s  requests={r['requests']}")
+
+
+if __name__ == "__main__":
+    main()
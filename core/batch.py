@@ -0,0 +1,146 @@
+# core/batch.py
+import io
+import logging
+import os
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".webp", ".bmp")
+# Every worker loads its own YOLO + PaddleOCR (unless MODEL_SERVER is set); on a single GPU keep this low
+WORKERS = max(1, (os.cpu_count() or 2) // 2)
+
+
+def iter_pages(source: str) -> Iterator[Tuple[str, bytes]]:
+    """Yield (name, encoded_image_bytes) in reading order from a folder or a .cbz/.zip archive."""
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if name.lower().endswith(IMAGE_EXTS):
+                with open(os.path.join(source, name), "rb") as f:
+                    yield name, f.read()
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as zf:
+            for name in sorted(n for n in zf.namelist() if n.lower().endswith(IMAGE_EXTS)):
+                yield name, zf.read(name)
+    else:
+        raise ValueError(f"{source} is neither a folder nor a zip/cbz archive")
+
+
+class PageWriter:
+    """Writes translated pages to a folder, or into a .cbz/.zip when `output` ends with one."""
+
+    def __init__(self, output: str):
+        self.output = output
+        self._zip = None
+        if output.lower().endswith((".cbz", ".zip")):
+            os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+            # pages are already compressed images
+            self._zip = zipfile.ZipFile(output, "w", compression=zipfile.ZIP_STORED)
+        else:
+            os.makedirs(output, exist_ok=True)
+
+    def write(self, name: str, data: bytes):
+        if self._zip is not None:
+            self._zip.writestr(name, data)
+        else:
+            path = os.path.join(self.output, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(data)
+
+    def close(self):
+        if self._zip is not None:
+            self._zip.close()
+
+
+# --- worker process side ---
+
+def _init_worker(stub_translator: bool, config_overrides: dict, workers: int):
+    """Runs once per worker: apply settings and load/warm the models for the worker's lifetime."""
+    from core.logger import setup_logger
+    from core import config, models
+    from core.translate import set_backend, set_rate_limit
+    from core.translation_engine import RATE_BURST, RATE_PER_SEC, StubBackend
+    setup_logger()
+    for key, value in config_overrides.items():
+        setattr(config, key, value)
+    if stub_translator:
+        set_backend(StubBackend())
+    # the rate limit is per process: split it so the workers together stay within RATE_PER_SEC
+    set_rate_limit(RATE_PER_SEC / workers, max(1, RATE_BURST // workers))
+    if config.MODEL_SERVER:
+        return  # the models are already warm in model_server.py
+    from core.ocr import ocr_models
+    from core.yolo_bubble import detector_models
+    models.warm_up(detector_models() + ocr_models())
+
+
+def _translate_page(name: str, data: bytes, fmt: str) -> Tuple[str, bytes, dict]:
+    from core.yolo_bubble import detect_bubbles, sort_bubbles_for_japanese
+    from core.ocr import extract_text_from_bubbles
+    from core.model_client import get_client
+    from core.translate import translate_batch
+    from core.ui_pillow_bubble import render_bubbles_on_image
+
+    t0 = time.perf_counter()
+    stats = {"bubbles": 0, "blocks": 0, "error": None}
+    out_name = os.path.splitext(name)[0] + "." + fmt
+    try:
+        img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            raise ValueError("could not decode image")
+        client = get_client()
+        if client is not None:
+            detect_bubbles, extract_text_from_bubbles = client.detect_bubbles, client.extract_text_from_bubbles
+        bubbles = sort_bubbles_for_japanese(detect_bubbles(img))
+        blocks = extract_text_from_bubbles(bubbles, frame=img) if bubbles else []
+        translations = translate_batch([b[0] for b in blocks]) if blocks else []
+        page = render_bubbles_on_image(img, blocks, translations)
+
+        buf = io.BytesIO()
+        page.save(buf, format="JPEG" if fmt == "jpg" else fmt.upper(), quality=92)
+        stats.update(bubbles=len(bubbles), blocks=len(blocks))
+        out = buf.getvalue()
+    except Exception as e:
+        logger.exception(f"Failed to translate page {name}")
+        # keep the chapter complete: pass the original page through
+        stats["error"] = str(e)
+        out_name, out = name, data
+    stats["seconds"] = time.perf_counter() - t0
+    return out_name, out, stats
+
+
+# --- parent process side ---
+
+def translate_pages(
+    source: str,
+    workers: int = WORKERS,
+    fmt: str = "png",
+    stub_translator: bool = False,
+    config_overrides: Optional[dict] = None
+) -> Iterator[Tuple[str, bytes, dict]]:
+    """
+    Stream pages through a process pool and yield (name, image_bytes, stats)
+    in page order. At most 2 * workers pages are in flight, so memory stays
+    flat on long chapters.
+    """
+    window = 2 * workers
+    pending = deque()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(stub_translator, config_overrides or {}, workers)
+    ) as pool:
+        for name, data in iter_pages(source):
+            pending.append(pool.submit(_translate_page, name, data, fmt))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
@@ -1,94 +1,103 @@
-import os
 import mss
 import cv2
 import numpy as np
 import logging
+import threading
+from core.debug_sink import debug_image
+from core.preprocess import preprocess_crop
 
-logging.basicConfig(level=logging.DEBUG)
-os.makedirs("debug", exist_ok=True)
+logger = logging.getLogger(__name__)
 
-def grab_region(region: dict, target_width: int = 1000) -> np.ndarray:
+class CaptureSession:
     """
-    Capture the given screen region, optionally resize it to at least target_width,
-    and return both the processed image and the scale factor used.
+    Long-lived screen capture. Keeps one mss handle open and exposes each
+    grabbed BGRA buffer as a NumPy view instead of copying it.
+    mss handles are per-thread, so use one session per thread.
     """
-    # 1) Capture
-    with mss.mss() as sct:
-        frame = sct.grab(region)
-    img = cv2.cvtColor(np.array(frame), cv2.COLOR_BGRA2RGB)
-    cv2.imwrite("debug/00_captured.png", img)
+
+    def __init__(self):
+        self._sct = mss.mss()
+
+    def grab_bgra(self, region: dict) -> np.ndarray:
+        """(h, w, 4) BGRA view over the screenshot buffer; no copy, no conversion."""
+        shot = self._sct.grab(region)
+        return np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+
+    def grab(self, region: dict, target_width: int = None, channels: str = "bgr") -> np.ndarray:
+        """
+        Capture region, optionally resized to target_width (aspect kept).
+        channels="bgr" returns a strided view dropping alpha, which is the
+        order YOLO and PaddleOCR expect; "bgra" returns the raw view.
+        """
+        img = self.grab_bgra(region)
+        if target_width and target_width != img.shape[1]:
+            h, w = img.shape[:2]
+            scale = target_width / w
+            interp = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+            img = cv2.resize(img, (target_width, max(1, round(h * scale))), interpolation=interp)
+        if channels == "bgra":
+            return img
+        return img[:, :, :3]
+
+    def close(self):
+        self._sct.close()
+
+
+_sessions = threading.local()
+
+
+def get_session() -> CaptureSession:
+    """The calling thread's capture session, created on first use."""
+    session = getattr(_sessions, "session", None)
+    if session is None:
+        session = _sessions.session = CaptureSession()
+    return session
+
+
+def close_session():
+    """Close the calling thread's capture session, if any; call before a capturing thread exits."""
+    session = getattr(_sessions, "session", None)
+    if session is not None:
+        _sessions.session = None
+        session.close()
+
+
+def grab_region(region: dict, target_width: int = None, channels: str = "bgr") -> np.ndarray:
+    """
+    Capture the given screen region through this thread's persistent session
+    and return it as BGR (a view, see CaptureSession.grab). With target_width
+    set, the frame is resized to that width.
+    """
+    img = get_session().grab(region, target_width, channels)
+    debug_image("00_captured.png", img)
 
     return img
 
+def downscale_for_detection(img: np.ndarray, max_side: int) -> tuple[np.ndarray, float]:
+    """
+    Shrink img so its longer side is max_side, for running the detector on
+    a small copy of a high-DPI frame. Returns (image, scale) with scale <= 1;
+    the input itself is returned when it is already small enough.
+    """
+    h, w = img.shape[:2]
+    if not max_side or max(h, w) <= max_side:
+        return img, 1.0
+    scale = max_side / max(h, w)
+    size = (max(1, round(w * scale)), max(1, round(h * scale)))
+    return cv2.resize(img, size, interpolation=cv2.INTER_AREA), scale
+
+
 def enhance_for_ocr_debug(
     img: np.ndarray,
-    debug_dir: str = "debug/ocr_steps"
+    debug_dir: str = "ocr_steps"
 ) -> np.ndarray:
     """
     Enhance cropped bubble image for better OCR accuracy.
-    At each major step, save a debug image in `debug_dir`.
+    At debug level 2, each major step is saved under `debug_dir` in the debug folder.
+    Kept for ad-hoc use; the OCR stage calls core.preprocess directly.
     """
-    os.makedirs(debug_dir, exist_ok=True)
-    step = 0
-
-    def save(step_name: str, image: np.ndarray):
-        nonlocal step
-        path = os.path.join(debug_dir, f"{step:02d}_{step_name}.png")
-        cv2.imwrite(path, image)
-        step += 1
-
     try:
-        # 00) Original capture
-        save("original", img)
-
-        TARGET_MIN = 200
-
-        # 01) Upscale if too small
-        h, w = img.shape[:2]
-        min_dim = min(h, w)
-        if min_dim < TARGET_MIN:
-            scale = TARGET_MIN / min_dim
-            img = cv2.resize(
-                img, None,
-                fx=scale, fy=scale,
-                interpolation=cv2.INTER_LANCZOS4
-            )
-            save("upscaled", img)
-        else:
-            save("skip_upscale", img)
-
-        # 02) Convert to grayscale
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        save("gray", gray)
-
-        # 03) CLAHE on grayscale
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        gray_clahe = clahe.apply(gray)
-        save("clahe", gray_clahe)
-
-        # 04) Otsu threshold → binary
-        th = cv2.adaptiveThreshold(
-            gray_clahe, 255,
-            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-            cv2.THRESH_BINARY,
-            blockSize=15,
-            C=5
-        )
-        save("adapt_th_on_clahe", th)
-
-        # 05) Morphological dilation (thickens thin strokes)
-        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2))
-        dilated = cv2.dilate(th, kernel, iterations=1)
-        save("dilated", dilated)
-
-        # back to BGR so PaddleOCR can accept it
-        final_bgr = cv2.cvtColor(dilated, cv2.COLOR_GRAY2BGR)
-        save("final_bgr", final_bgr)
-
-        return final_bgr
-
+        return preprocess_crop(img, "full", debug_dir)[0]
     except Exception as e:
-        logging.error(f"enhance_for_ocr_debug failed at step {step}: {e}")
-        # fallback: return the last successfully processed image
+        logger.error(f"enhance_for_ocr_debug failed: {e}")
         return img
-
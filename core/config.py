@@ -0,0 +1,81 @@
+# core/config.py
+"""
+Runtime settings. Any of these names can be overridden from a config.json
+next to app.py, e.g. {"OCR_DEVICE": "cpu", "YOLO_DEVICE": "cpu"}.
+"""
+import json
+import logging
+import os
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), '..', 'config.json')
+
+# --- models ---
+OCR_ENGINE = "paddle"                       # "paddle" or "manga_ocr" (optional `pip install manga-ocr`)
+OCR_DEVICE = "gpu:0"                        # PaddleOCR device: "gpu:0", "cpu", ...
+OCR_DET_MODEL = "PP-OCRv5_server_det"       # "PP-OCRv5_mobile_det" is much lighter on CPU
+OCR_REC_MODEL = "PP-OCRv5_server_rec"
+OCR_TEXTLINE_ORIENTATION = True
+OCR_BATCH_SIZE = 16
+
+OCR_CACHE = True                            # reuse OCR results for bubble crops seen before (same pixels)
+OCR_CACHE_PERSIST = False                   # also keep them in ocr_cache.sqlite3 across restarts
+
+YOLO_MODEL_PATH = "models/comic-speech-bubble-detector.pt"
+YOLO_DEVICE = None                          # Ultralytics device: None = auto, "cpu", "0", ...
+YOLO_ONNX_PATH = "models/comic-speech-bubble-detector.onnx"
+DETECTOR_BACKEND = "ultralytics"            # "ultralytics" (.pt) or "onnx" (onnxruntime on CPU, `pip install onnxruntime`)
+DETECT_IMGSZ = 640                          # detector input size; smaller is faster on CPU
+DETECT_MULTIRES = True                      # detect on a copy downscaled to DETECT_IMGSZ, crop bubbles from full resolution
+DETECT_CONF = 0.3
+DETECT_IOU = 0.5
+ONNX_THREADS = 0                            # onnxruntime intra-op threads, 0 = its default
+
+# capture regions, each with its own overlay; "name" is optional. Two entries cover a two-page spread
+REGIONS = [
+    {"name": "main", "top": 128, "left": 575, "width": 768, "height": 864},
+]
+SCHEDULE_WINDOW_MS = 10                     # with several regions: how long requests wait to share a model call
+
+MODEL_SERVER = None                         # true: run detection and OCR in model_server.py on its local socket/pipe;
+                                            # or its address: a socket/pipe path, "127.0.0.1:6010" for TCP
+MODEL_SERVER_AUTHKEY = None                 # shared secret; None = the one model_server.py keeps in MODEL_SERVER_KEY_FILE
+MODEL_SERVER_KEY_FILE = os.path.join(os.path.dirname(__file__), '..', 'model_server.key')
+MODEL_SERVER_TIMEOUT_SEC = 60               # give up on a request the server has not answered by then
+
+STREAM_BUBBLES = True                       # draw each bubble as soon as its translation arrives
+STREAM_OCR_CHUNK = 0                        # bubbles OCR'd per call in streaming mode (0 = all in one batched call)
+
+HISTORY = True                              # keep every translated bubble in history.sqlite3 (see history_tool.py)
+
+WARM_UP_MODELS = True                       # load and run every model once in the background at startup
+
+# --- logging ---
+LOG_LEVEL = "INFO"                          # root level; DEBUG logs every OCR line and translation
+LOG_CONSOLE_LEVEL = "INFO"
+LOG_LEVELS = {                              # per-logger overrides, e.g. {"core.ocr": "DEBUG"}
+    "urllib3": "WARNING",
+    "PIL": "INFO",
+    "ppocr": "WARNING",
+    "ultralytics": "WARNING",
+}
+LOG_FILE_MAX_BYTES = 5 * 1024 * 1024        # app.log rotates at this size
+LOG_FILE_BACKUPS = 3                        # app.log.1 .. app.log.3 are kept
+
+
+def _apply_overrides(path: str = CONFIG_PATH):
+    if not os.path.exists(path):
+        return
+    try:
+        with open(path, encoding="utf-8") as f:
+            overrides = json.load(f)
+    except (OSError, ValueError) as e:
+        logging.error(f"Could not read {path}: {e}")
+        return
+    for key, value in overrides.items():
+        if key.isupper() and key in globals():
+            globals()[key] = value
+        else:
+            logging.warning(f"Unknown config key in {path}: {key}")
+
+
+_apply_overrides()
@@ -0,0 +1,83 @@
+# core/debug_sink.py
+import logging
+import os
+import queue
+import random
+import threading
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEBUG_DIR = "debug"
+DEBUG_LEVEL = 0            # 0 = off, 1 = captured frame and bubble crops, 2 = also every preprocessing step
+DEBUG_SAMPLE_RATE = 1.0    # fraction of cycles whose artifacts are written when DEBUG_LEVEL > 0
+QUEUE_SIZE = 32            # pending images; further ones are dropped rather than blocking the pipeline
+
+_queue: "queue.Queue[tuple[str, np.ndarray]]" = queue.Queue(maxsize=QUEUE_SIZE)
+_writer = None
+_writer_lock = threading.Lock()
+_sampled = True
+dropped = 0
+written = 0
+
+
+def configure(level: int = None, sample_rate: float = None):
+    global DEBUG_LEVEL, DEBUG_SAMPLE_RATE
+    if level is not None:
+        DEBUG_LEVEL = level
+    if sample_rate is not None:
+        DEBUG_SAMPLE_RATE = sample_rate
+
+
+def new_cycle():
+    """Decide once per cycle whether its artifacts are sampled, so a cycle is kept whole or not at all."""
+    global _sampled
+    _sampled = DEBUG_LEVEL > 0 and random.random() < DEBUG_SAMPLE_RATE
+
+
+def debug_enabled(level: int = 1) -> bool:
+    """Cheap guard for callers that would otherwise do extra work just to produce debug images."""
+    return 0 < level <= DEBUG_LEVEL and _sampled
+
+
+def debug_image(name: str, img: np.ndarray, level: int = 1):
+    """
+    Queue img to be written as DEBUG_DIR/name by the background writer.
+    Returns immediately; nothing is copied or encoded when debug is off.
+    """
+    global dropped
+    if not debug_enabled(level) or img is None:
+        return
+    _ensure_writer()
+    try:
+        # copy: callers may reuse or mutate the buffer once we return
+        _queue.put_nowait((name, np.array(img, copy=True)))
+    except queue.Full:
+        dropped += 1
+        if dropped % 50 == 1:
+            logger.warning(f"Debug image queue full, dropped {dropped} images so far")
+
+
+def _ensure_writer():
+    global _writer
+    if _writer is not None:
+        return
+    with _writer_lock:
+        if _writer is None:
+            _writer = threading.Thread(target=_write_loop, name="debug-writer", daemon=True)
+            _writer.start()
+
+
+def _write_loop():
+    global written
+    while True:
+        name, img = _queue.get()
+        path = os.path.join(DEBUG_DIR, name)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            cv2.imwrite(path, img)
+            written += 1
+        except Exception as e:
+            logger.error(f"Failed to write debug image {path}: {e}")
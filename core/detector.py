@@ -0,0 +1,174 @@
+# core/detector.py
+import logging
+import os
+import threading
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from core import config, models
+
+logger = logging.getLogger(__name__)
+
+LETTERBOX_COLOR = (114, 114, 114)   # Ultralytics' padding value
+MAX_WH = 7680                       # class offset for per-class NMS in one call
+
+
+class BubbleDetector:
+    """
+    Speech-bubble detector backend. predict_batch() returns one (N, 4)
+    float array of x1, y1, x2, y2 boxes in input-image pixels per image.
+    """
+    name = "base"
+
+    def __init__(self, imgsz: int = None, conf: float = None, iou: float = None):
+        self.imgsz = imgsz or config.DETECT_IMGSZ
+        self.conf = config.DETECT_CONF if conf is None else conf
+        self.iou = config.DETECT_IOU if iou is None else iou
+
+    def predict(self, image: np.ndarray) -> np.ndarray:
+        return self.predict_batch([image])[0]
+
+    def predict_batch(self, images: List[np.ndarray]) -> List[np.ndarray]:
+        raise NotImplementedError
+
+    def model_names(self) -> Tuple[str, ...]:
+        """core.models registry names this backend loads (for warm-up)."""
+        return ()
+
+
+class UltralyticsDetector(BubbleDetector):
+    """The .pt model through the full Ultralytics predict() stack (GPU or CPU)."""
+    name = "ultralytics"
+
+    def predict_batch(self, images: List[np.ndarray]) -> List[np.ndarray]:
+        with models.use("yolo") as yolo:
+            results = yolo.predict(
+                images, imgsz=self.imgsz, conf=self.conf, iou=self.iou,
+                device=config.YOLO_DEVICE, verbose=False
+            )
+            return [
+                r.boxes.xyxy.cpu().numpy() if r.boxes is not None else np.empty((0, 4), np.float32)
+                for r in results
+            ]
+
+    def model_names(self) -> Tuple[str, ...]:
+        return ("yolo",)
+
+
+def letterbox(image: np.ndarray, size: int) -> Tuple[np.ndarray, float, Tuple[int, int]]:
+    """Resize keeping aspect ratio and pad to size x size; returns (image, ratio, (pad_x, pad_y))."""
+    h, w = image.shape[:2]
+    ratio = min(size / h, size / w)
+    nw, nh = int(round(w * ratio)), int(round(h * ratio))
+    if (nw, nh) != (w, h):
+        image = cv2.resize(image, (nw, nh), interpolation=cv2.INTER_LINEAR)
+    pad_x, pad_y = (size - nw) // 2, (size - nh) // 2
+    image = cv2.copyMakeBorder(image, pad_y, size - nh - pad_y, pad_x, size - nw - pad_x,
+                               cv2.BORDER_CONSTANT, value=LETTERBOX_COLOR)
+    return image, ratio, (pad_x, pad_y)
+
+
+class OnnxDetector(BubbleDetector):
+    """
+    The detector exported to ONNX (see export_onnx) run with onnxruntime on
+    CPU: letterbox to a fixed imgsz, one batched session.run(), then
+    confidence filtering and NMS in NumPy/OpenCV. Expects the YOLOv8-style
+    output layout (batch, 4 + classes, anchors).
+    """
+    name = "onnx"
+
+    def _prepare(self, images: List[np.ndarray]):
+        batch, meta = [], []
+        for image in images:
+            boxed, ratio, pad = letterbox(image, self.imgsz)
+            batch.append(boxed)
+            meta.append((ratio, pad, image.shape[:2]))
+        # BGR HWC uint8 -> RGB NCHW float32 in [0, 1]
+        blob = np.stack(batch)[..., ::-1].transpose(0, 3, 1, 2)
+        return np.ascontiguousarray(blob, dtype=np.float32) / 255.0, meta
+
+    def _postprocess(self, pred: np.ndarray, ratio: float, pad: Tuple[int, int], shape) -> np.ndarray:
+        pred = pred.T                                  # (anchors, 4 + classes)
+        class_scores = pred[:, 4:]
+        classes = class_scores.argmax(axis=1)
+        scores = class_scores[np.arange(len(pred)), classes]
+        keep = scores >= self.conf
+        if not keep.any():
+            return np.empty((0, 4), np.float32)
+        cxcywh, scores, classes = pred[keep, :4], scores[keep], classes[keep]
+
+        xywh = cxcywh.copy()
+        xywh[:, :2] -= cxcywh[:, 2:] / 2
+        # offset boxes per class so one NMS call never suppresses across classes
+        shifted = xywh.copy()
+        shifted[:, :2] += classes[:, None] * MAX_WH
+        idx = cv2.dnn.NMSBoxes(shifted.tolist(), scores.tolist(), self.conf, self.iou)
+        idx = np.asarray(idx, dtype=np.int64).reshape(-1)
+        boxes = xywh[idx]
+        boxes[:, 2:] += boxes[:, :2]                   # -> x1, y1, x2, y2
+
+        boxes -= (pad[0], pad[1], pad[0], pad[1])
+        boxes /= ratio
+        h, w = shape
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, w)
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, h)
+        return boxes[np.argsort(-scores[idx], kind="stable")]
+
+    def predict_batch(self, images: List[np.ndarray]) -> List[np.ndarray]:
+        # InferenceSession.run is thread-safe, so unlike the other models this one needs no models.use()
+        session = models.get("yolo_onnx")
+        blob, meta = self._prepare(images)
+        input_name = session.get_inputs()[0].name
+        if session.get_inputs()[0].shape[0] == 1 and len(images) > 1:
+            # exported without dynamic batch: one run per image
+            preds = np.concatenate([session.run(None, {input_name: blob[i:i + 1]})[0] for i in range(len(images))])
+        else:
+            preds = session.run(None, {input_name: blob})[0]
+        return [self._postprocess(p, *m) for p, m in zip(preds, meta)]
+
+    def model_names(self) -> Tuple[str, ...]:
+        return ("yolo_onnx",)
+
+
+def export_onnx(pt_path: str = None, imgsz: int = None) -> str:
+    """Export the Ultralytics .pt detector to ONNX with a dynamic batch axis; returns the .onnx path."""
+    from ultralytics import YOLO
+    pt_path = pt_path or config.YOLO_MODEL_PATH
+    path = YOLO(pt_path).export(format="onnx", imgsz=imgsz or config.DETECT_IMGSZ, dynamic=True)
+    logger.info(f"Exported {pt_path} to {path}")
+    return path
+
+
+DETECTORS = {
+    UltralyticsDetector.name: UltralyticsDetector,
+    OnnxDetector.name: OnnxDetector,
+}
+
+_detector: Optional[BubbleDetector] = None
+_detector_lock = threading.Lock()
+
+
+def get_detector() -> BubbleDetector:
+    """The backend named by config.DETECTOR_BACKEND, created on first use."""
+    global _detector
+    if _detector is None:
+        with _detector_lock:
+            if _detector is None:
+                name = config.DETECTOR_BACKEND
+                if name == OnnxDetector.name and not os.path.exists(config.YOLO_ONNX_PATH):
+                    logger.warning(f"{config.YOLO_ONNX_PATH} not found, using {UltralyticsDetector.name!r}"
+                                   " (create it with core.detector.export_onnx())")
+                    name = UltralyticsDetector.name
+                elif name not in DETECTORS:
+                    logger.warning(f"Unknown detector backend {name!r}, using {UltralyticsDetector.name!r}")
+                    name = UltralyticsDetector.name
+                _detector = DETECTORS[name]()
+    return _detector
+
+
+def set_detector(detector: Optional[BubbleDetector]):
+    """Swap the detector backend (None = rebuild from config on next use)."""
+    global _detector
+    _detector = detector
@@ -0,0 +1,143 @@
+# core/frame_watch.py
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+import cv2
+import numpy as np
+
+from core.capture import close_session, grab_region
+
+logger = logging.getLogger(__name__)
+
+POLL_HZ = 4.0                 # auto mode polling rate
+FINGERPRINT_SIZE = (32, 32)   # block-mean grid the frame is reduced to
+CHANGE_THRESHOLD = 6.0        # mean abs difference (0-255) that counts as a new page
+SETTLE_POLLS = 1              # consecutive stable polls required before firing (skips mid-scroll frames)
+
+
+def frame_fingerprint(img: np.ndarray) -> np.ndarray:
+    """Downscaled grayscale block means of the frame; INTER_AREA averages each block."""
+    small = cv2.resize(img, FINGERPRINT_SIZE, interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        code = cv2.COLOR_BGRA2GRAY if small.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+        small = cv2.cvtColor(small, code)
+    return small.astype(np.int16)
+
+
+def fingerprint_distance(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.abs(a - b).mean())
+
+
+class FrameWatcher:
+    """
+    Polls the capture region and calls on_change(frame) once the page has
+    materially changed since the last processed frame and stopped moving.
+    on_change is called on the watcher thread. From then until rebaseline()
+    (or while suspend()ed) changes are ignored: the overlay repainting over
+    the region during a cycle is not a page change.
+    """
+
+    def __init__(
+        self,
+        region: dict,
+        on_change: Callable[[np.ndarray], None],
+        poll_hz: float = POLL_HZ,
+        threshold: float = CHANGE_THRESHOLD,
+        settle_polls: int = SETTLE_POLLS
+    ):
+        self.region = region
+        self.on_change = on_change
+        self.interval = 1.0 / poll_hz
+        self.threshold = threshold
+        self.settle_polls = settle_polls
+        self._processed: Optional[np.ndarray] = None
+        self._rebaseline = threading.Event()
+        self._suspended = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop = threading.Event()
+        self._processed = None
+        self._rebaseline.clear()
+        self._suspended.clear()
+        self._thread = threading.Thread(target=self._run, args=(self._stop,), name="frame-watch", daemon=True)
+        self._thread.start()
+        logger.info(f"Auto-translate ON ({1 / self.interval:.1f} Hz, threshold {self.threshold})")
+
+    def stop(self):
+        self._stop.set()
+        self._thread = None
+        logger.info("Auto-translate OFF")
+
+    def toggle(self):
+        if self.running:
+            self.stop()
+        else:
+            self.start()
+
+    def suspend(self):
+        """Ignore changes until rebaseline(), e.g. while a manually triggered cycle repaints the overlay."""
+        self._suspended.set()
+
+    def rebaseline(self):
+        """
+        Take the next polled frame as the processed one and resume watching.
+        Call once the cycle's final overlay has been painted, so our own
+        bubbles are not mistaken for a page change.
+        """
+        self._rebaseline.set()
+
+    def _run(self, stop: threading.Event):
+        try:
+            self._poll(stop)
+        finally:
+            # every start() runs a new thread, and with it a new mss handle
+            close_session()
+
+    def _poll(self, stop: threading.Event):
+        previous = None
+        stable = 0
+        next_poll = time.perf_counter()
+        while not stop.is_set():
+            try:
+                # BGRA view: the fingerprint resize reads it directly, no channel-drop copy
+                frame = grab_region(self.region, channels="bgra")
+                fp = frame_fingerprint(frame)
+            except Exception as e:
+                logger.error(f"Auto-translate capture failed: {e}")
+                fp = None
+
+            if fp is not None:
+                if self._rebaseline.is_set():
+                    self._rebaseline.clear()
+                    self._suspended.clear()
+                    self._processed = fp
+                elif self._suspended.is_set():
+                    pass
+                elif self._processed is None or fingerprint_distance(fp, self._processed) > self.threshold:
+                    moving = previous is not None and fingerprint_distance(fp, previous) > self.threshold
+                    stable = 0 if moving else stable + 1
+                    if stable >= self.settle_polls:
+                        logger.info("Page change detected, starting OCR cycle")
+                        self._processed = fp
+                        stable = 0
+                        self._suspended.set()
+                        self.on_change(frame[:, :, :3])
+                previous = fp
+
+            next_poll += self.interval
+            delay = next_poll - time.perf_counter()
+            if delay < 0:
+                # fell behind (slow capture); don't try to catch up with a burst of polls
+                next_poll = time.perf_counter()
+                delay = 0
+            stop.wait(delay)
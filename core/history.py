@@ -0,0 +1,255 @@
+# core/history.py
+import csv
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Iterator, List, Optional
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+HISTORY_PATH = os.path.join(os.path.dirname(__file__), '..', 'history.sqlite3')
+THUMB_MAX_SIDE = 128        # thumbnails are scaled down to fit this box
+THUMB_FORMAT = ".webp"      # or ".jpg"
+THUMB_QUALITY = 70
+QUEUE_SIZE = 256            # pending cycles; further ones are dropped rather than blocking the pipeline
+BATCH_ROWS = 256            # rows per INSERT transaction at most
+FLUSH_SEC = 1.0             # a partial batch is written after this long
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    text TEXT NOT NULL,
+    translation TEXT NOT NULL,
+    x1 INTEGER, y1 INTEGER, x2 INTEGER, y2 INTEGER,
+    conf REAL,
+    thumb BLOB
+);
+CREATE INDEX IF NOT EXISTS idx_entries_created ON entries (created);
+"""
+
+# external-content FTS index kept in sync by triggers; trigram allows substring search in Japanese
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    text, translation, content='entries', content_rowid='id', tokenize='{tokenize}'
+);
+CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_fts(rowid, text, translation) VALUES (new.id, new.text, new.translation);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries BEGIN
+    INSERT INTO entries_fts(entries_fts, rowid, text, translation) VALUES ('delete', old.id, old.text, old.translation);
+END;
+"""
+
+EXPORT_COLUMNS = ("id", "created", "text", "translation", "x1", "y1", "x2", "y2", "conf")
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def make_thumbnail(crop: np.ndarray) -> Optional[bytes]:
+    h, w = crop.shape[:2]
+    if not h or not w:
+        return None
+    scale = min(1.0, THUMB_MAX_SIDE / max(h, w))
+    if scale < 1.0:
+        crop = cv2.resize(crop, (max(1, round(w * scale)), max(1, round(h * scale))), interpolation=cv2.INTER_AREA)
+    flag = cv2.IMWRITE_WEBP_QUALITY if THUMB_FORMAT == ".webp" else cv2.IMWRITE_JPEG_QUALITY
+    ok, buf = cv2.imencode(THUMB_FORMAT, crop, [flag, THUMB_QUALITY])
+    return buf.tobytes() if ok else None
+
+
+class HistoryStore:
+    """
+    Every translated bubble (text, translation, box, confidence, thumbnail)
+    in SQLite with an FTS5 index. record() only enqueues; a writer thread
+    cuts thumbnails and inserts in batches, so callers never wait on disk.
+    """
+
+    def __init__(self, path: str = HISTORY_PATH):
+        self.path = path
+        self.dropped = 0
+        self.written = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self._conn = _connect(path)
+        self._conn.executescript(_SCHEMA)
+        self.fts = self._create_fts()
+        self._conn.commit()
+        self._writer = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+        self._writer.start()
+
+    def _create_fts(self) -> bool:
+        for tokenize in ("trigram", "unicode61"):
+            try:
+                self._conn.executescript(_FTS_SCHEMA.format(tokenize=tokenize))
+                return True
+            except sqlite3.OperationalError as e:
+                logger.debug("FTS5 with %s tokenizer unavailable: %s", tokenize, e)
+        logger.warning("SQLite has no FTS5, history search falls back to LIKE")
+        return False
+
+    # --- writing ---
+
+    def record(self, blocks: list, translations: List[str], frame: Optional[np.ndarray] = None):
+        """
+        Queue one cycle's bubbles. blocks are (text, box, conf, angle) in
+        full-frame coordinates; frame is kept by reference for the thumbnails,
+        so it must not be written to afterwards (captured frames never are).
+        """
+        try:
+            self._queue.put_nowait((time.time(), blocks, translations, frame))
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped % 50 == 1:
+                logger.warning(f"History queue full, dropped {self.dropped} cycles so far")
+
+    def _rows(self, item) -> list:
+        created, blocks, translations, frame = item
+        rows = []
+        for (text, (x1, y1, x2, y2), conf, _), translation in zip(blocks, translations):
+            if not text:
+                continue
+            thumb = None
+            if frame is not None:
+                try:
+                    thumb = make_thumbnail(frame[max(0, y1):y2, max(0, x1):x2])
+                except cv2.error as e:
+                    logger.debug("Thumbnail failed: %s", e)
+            rows.append((created, text, translation or "", x1, y1, x2, y2, float(conf), thumb))
+        return rows
+
+    def _write_loop(self):
+        # the writer has its own connection; readers use self._conn (WAL lets both run)
+        conn = _connect(self.path)
+        while True:
+            item = self._queue.get()
+            rows, done = [], []
+            deadline = time.monotonic() + FLUSH_SEC
+            while item is not None:
+                if isinstance(item, threading.Event):
+                    done.append(item)
+                else:
+                    rows.extend(self._rows(item))
+                if len(rows) >= BATCH_ROWS or done:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if rows:
+                try:
+                    with conn:
+                        conn.executemany(
+                            "INSERT INTO entries (created, text, translation, x1, y1, x2, y2, conf, thumb) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                            rows
+                        )
+                    self.written += len(rows)
+                except sqlite3.Error as e:
+                    logger.error(f"Failed to write {len(rows)} history rows: {e}")
+            for event in done:
+                event.set()
+            if item is None:
+                conn.close()
+                return
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Block until everything queued so far is on disk (for tools and shutdown, not the pipeline)."""
+        event = threading.Event()
+        self._queue.put(event)
+        return event.wait(timeout)
+
+    def close(self):
+        self._queue.put(None)
+        self._writer.join(timeout=5.0)
+        with self._lock:
+            self._conn.close()
+
+    # --- reading ---
+
+    def _select(self, query: Optional[str], columns: str, limit: Optional[int], newest_first: bool):
+        order = "DESC" if newest_first else "ASC"
+        limit_sql = f" LIMIT {int(limit)}" if limit else ""
+        if not query:
+            return f"SELECT {columns} FROM entries ORDER BY id {order}{limit_sql}", ()
+        if self.fts and len(query) >= 3:
+            # quoted: the query is a literal phrase, not FTS syntax
+            phrase = '"' + query.replace('"', '""') + '"'
+            return (f"SELECT {columns} FROM entries WHERE id IN "
+                    f"(SELECT rowid FROM entries_fts WHERE entries_fts MATCH ?) ORDER BY id {order}{limit_sql}",
+                    (phrase,))
+        # trigram needs 3+ characters; short queries scan
+        like = f"%{query}%"
+        return (f"SELECT {columns} FROM entries WHERE text LIKE ? OR translation LIKE ? ORDER BY id {order}{limit_sql}",
+                (like, like))
+
+    def search(self, query: str = None, limit: int = 50) -> List[dict]:
+        """Newest entries whose text or translation contains query (all entries when query is empty)."""
+        sql, params = self._select(query, ", ".join(EXPORT_COLUMNS), limit, newest_first=True)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(zip(EXPORT_COLUMNS, row)) for row in rows]
+
+    def thumbnail(self, entry_id: int) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute("SELECT thumb FROM entries WHERE id=?", (entry_id,)).fetchone()
+        return row[0] if row else None
+
+    def iter_entries(self, query: str = None) -> Iterator[dict]:
+        """Stream matching entries oldest first without loading them all; uses its own connection."""
+        sql, params = self._select(query, ", ".join(EXPORT_COLUMNS), None, newest_first=False)
+        conn = sqlite3.connect(self.path)
+        try:
+            for row in conn.execute(sql, params):
+                yield dict(zip(EXPORT_COLUMNS, row))
+        finally:
+            conn.close()
+
+    def export_csv(self, path: str, query: str = None) -> int:
+        count = 0
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(EXPORT_COLUMNS)
+            for entry in self.iter_entries(query):
+                entry["created"] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry["created"]))
+                writer.writerow([entry[c] for c in EXPORT_COLUMNS])
+                count += 1
+        return count
+
+    def export_jsonl(self, path: str, query: str = None) -> int:
+        count = 0
+        with open(path, "w", encoding="utf-8") as f:
+            for entry in self.iter_entries(query):
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                count += 1
+        return count
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+_store: Optional[HistoryStore] = None
+_store_lock = threading.Lock()
+
+
+def get_history() -> HistoryStore:
+    """The process-wide store, opened on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = HistoryStore()
+    return _store
@@ -1,22 +1,66 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
+
+from core import config
+
+LOG_PATH = os.path.join(os.path.dirname(__file__), '..', 'app.log')
+LOG_FORMAT = '%(asctime)s %(levelname)s %(name)s %(message)s'
+
+_listener = None
+
 
 def setup_logger():
-    log_path = os.path.join(os.path.dirname(__file__), '..', 'app.log')
-    logger = logging.getLogger()
-    logger.setLevel(logging.DEBUG)
+    """
+    Route all records through a QueueHandler so callers only enqueue; a
+    QueueListener thread does the formatting and the file/console I/O.
+    Levels come from config.LOG_LEVEL / LOG_LEVELS. Safe to call again
+    (e.g. in batch worker processes): the previous listener is replaced.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
 
-    if logger.hasHandlers():
-        logger.handlers.clear()
+    formatter = logging.Formatter(LOG_FORMAT)
 
-    file_handler = logging.FileHandler(log_path, mode='a', encoding='utf-8')
-    file_handler.setLevel(logging.DEBUG)
-    file_format = logging.Formatter('%(asctime)s %(levelname)s %(message)s')
-    file_handler.setFormatter(file_format)
+    file_handler = logging.handlers.RotatingFileHandler(
+        LOG_PATH,
+        maxBytes=config.LOG_FILE_MAX_BYTES,
+        backupCount=config.LOG_FILE_BACKUPS,
+        encoding='utf-8',
+        delay=True
+    )
+    file_handler.setFormatter(formatter)
 
     console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.DEBUG)
-    console_handler.setFormatter(file_format)
+    console_handler.setLevel(config.LOG_CONSOLE_LEVEL)
+    console_handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.setLevel(config.LOG_LEVEL)
+    if root.hasHandlers():
+        root.handlers.clear()
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    for name, level in config.LOG_LEVELS.items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = logging.handlers.QueueListener(
+        log_queue, file_handler, console_handler, respect_handler_level=True
+    )
+    _listener.start()
+
+
+def shutdown_logger():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
 
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+atexit.register(shutdown_logger)
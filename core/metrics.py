@@ -0,0 +1,208 @@
+# core/metrics.py
+import cProfile
+import csv
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+RING_SIZE = 200                 # cycles kept in memory for export
+METRICS_DIR = "metrics"
+STAGES = ("capture", "detect", "preprocess", "ocr", "translate", "render")
+
+_local = threading.local()
+
+
+class CycleTrace:
+    """Spans, counters and gauges recorded for one pipeline cycle."""
+
+    def __init__(self, cycle_id: int, profile: bool = False):
+        self.id = cycle_id
+        self.started = time.time()
+        self.t0 = time.perf_counter()
+        self.spans: List[dict] = []
+        self.counters: Dict[str, float] = {}
+        self.gauges: Dict[str, float] = {}
+        self.status = "running"
+        self.total = None
+        self.profile = profile
+        self.profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(name, start, time.perf_counter() - start, **attrs)
+
+    def add_span(self, name: str, start: float, duration: float, **attrs):
+        span = {"name": name, "start_ms": (start - self.t0) * 1000, "ms": duration * 1000,
+                "thread": threading.current_thread().name}
+        if attrs:
+            span["attrs"] = attrs
+        with self._lock:
+            self.spans.append(span)
+
+    def count(self, name: str, n: float = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def gauge(self, name: str, value: float):
+        self.gauges[name] = value
+
+    def stage_ms(self) -> Dict[str, float]:
+        """Total milliseconds per top-level stage (spans without a dot in their name)."""
+        totals = {}
+        with self._lock:
+            for span in self.spans:
+                if "." not in span["name"]:
+                    totals[span["name"]] = totals.get(span["name"], 0.0) + span["ms"]
+        return totals
+
+    def to_dict(self) -> dict:
+        stages = self.stage_ms()
+        with self._lock:
+            return {
+                "cycle": self.id,
+                "started": self.started,
+                "status": self.status,
+                "total_ms": self.total * 1000 if self.total is not None else None,
+                "stages_ms": stages,
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+                "spans": list(self.spans),
+            }
+
+
+class Tracer:
+    """Keeps the last RING_SIZE finished cycle traces and exports them."""
+
+    def __init__(self, ring_size: int = RING_SIZE):
+        self.ring = deque(maxlen=ring_size)
+        self._profile_next = False
+        self._lock = threading.Lock()
+
+    def begin(self, cycle_id: int) -> CycleTrace:
+        with self._lock:
+            profile, self._profile_next = self._profile_next, False
+        if profile:
+            logger.info(f"Profiling cycle {cycle_id} with cProfile")
+        return CycleTrace(cycle_id, profile)
+
+    def finish(self, trace: CycleTrace, status: str = "ok"):
+        with self._lock:
+            if trace.status != "running":
+                return
+            trace.total = time.perf_counter() - trace.t0
+            trace.status = status
+            self.ring.append(trace)
+        if trace.profiles:
+            self._dump_profile(trace)
+
+    def profile_next(self):
+        """Capture a cProfile of the next cycle (hotkey)."""
+        with self._lock:
+            self._profile_next = True
+        logger.info("The next OCR cycle will be profiled")
+
+    def _dump_profile(self, trace: CycleTrace):
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        path = os.path.join(METRICS_DIR, f"profile_cycle_{trace.id}_{time.strftime('%Y%m%d_%H%M%S')}.prof")
+        stats = pstats.Stats(trace.profiles[0])
+        for prof in trace.profiles[1:]:
+            stats.add(prof)
+        stats.dump_stats(path)
+        out = io.StringIO()
+        pstats.Stats(path, stream=out).sort_stats("cumulative").print_stats(15)
+        logger.info(f"cProfile of cycle {trace.id} saved to {path}\n{out.getvalue()}")
+
+    def records(self) -> List[dict]:
+        with self._lock:
+            traces = list(self.ring)
+        return [trace.to_dict() for trace in traces]
+
+    def export_jsonl(self, path: str) -> str:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for record in self.records():
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return path
+
+    def export_csv(self, path: str) -> str:
+        """One row per cycle: status, total, per-stage ms, counters and gauges (spans are JSONL only)."""
+        records = self.records()
+        counters = sorted({k for r in records for k in r["counters"]})
+        gauges = sorted({k for r in records for k in r["gauges"]})
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["cycle", "started", "status", "total_ms"]
+                            + [f"{s}_ms" for s in STAGES] + counters + gauges)
+            for r in records:
+                writer.writerow(
+                    [r["cycle"], time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(r["started"])),
+                     r["status"], _fmt(r["total_ms"])]
+                    + [_fmt(r["stages_ms"].get(s)) for s in STAGES]
+                    + [r["counters"].get(k, "") for k in counters]
+                    + [_fmt(r["gauges"].get(k)) for k in gauges]
+                )
+        return path
+
+    def export(self) -> tuple:
+        """Write the ring buffer as JSON Lines and CSV under METRICS_DIR."""
+        stamp = time.strftime("%Y%m%d_%H%M%S")
+        jsonl = self.export_jsonl(os.path.join(METRICS_DIR, f"cycles_{stamp}.jsonl"))
+        csv_path = self.export_csv(os.path.join(METRICS_DIR, f"cycles_{stamp}.csv"))
+        logger.info(f"Exported {len(self.ring)} cycle traces to {jsonl} and {csv_path}")
+        return jsonl, csv_path
+
+
+def _fmt(value) -> str:
+    return "" if value is None else f"{value:.2f}"
+
+
+tracer = Tracer()
+
+
+# --- current trace of the calling thread, so deep code can record without passing it around ---
+
+def current() -> Optional[CycleTrace]:
+    return getattr(_local, "trace", None)
+
+
+@contextmanager
+def bind(trace: Optional[CycleTrace]):
+    """Make trace the calling thread's current trace for the duration of the block."""
+    previous = getattr(_local, "trace", None)
+    _local.trace = trace
+    try:
+        yield trace
+    finally:
+        _local.trace = previous
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Record a span on the current trace; a no-op outside a traced cycle."""
+    trace = current()
+    if trace is None:
+        yield
+        return
+    with trace.span(name, **attrs):
+        yield
+
+
+def count(name: str, n: float = 1):
+    trace = current()
+    if trace is not None:
+        trace.count(name, n)
@@ -0,0 +1,231 @@
+# core/model_client.py
+import atexit
+import logging
+import os
+import secrets
+import stat
+import tempfile
+import threading
+from multiprocessing import resource_tracker, shared_memory
+from multiprocessing.connection import Client
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from core import config, metrics
+
+logger = logging.getLogger(__name__)
+
+SHM_ALIGN = 64                  # every array in the shared block starts on this boundary
+SHM_GROW = 4 * 1024 * 1024      # the block is grown in steps of this many bytes
+
+# where model_server.py listens unless told otherwise: reachable from this machine only
+if os.name == "nt":
+    DEFAULT_ADDRESS = r"\\.\pipe\autotranslation-models"
+else:
+    DEFAULT_ADDRESS = os.path.join(tempfile.gettempdir(), f"autotranslation-models-{os.getuid()}.sock")
+
+# where one array sits in the shared block: (offset, shape, dtype)
+ArraySpec = Tuple[int, Tuple[int, ...], str]
+
+
+class ModelServerError(RuntimeError):
+    pass
+
+
+def parse_address(address):
+    """True for DEFAULT_ADDRESS, "host:port" for TCP, anything else is a socket/pipe path."""
+    if address is True:
+        return DEFAULT_ADDRESS
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit():
+        return host or "127.0.0.1", int(port)
+    return address
+
+
+def load_authkey(create: bool = False) -> bytes:
+    """
+    config.MODEL_SERVER_AUTHKEY, else the key in MODEL_SERVER_KEY_FILE. The
+    server creates that file, readable by this user only, on its first run;
+    a client without it, or with a file others can read, refuses to connect.
+    The key guards more than access: requests are unpickled on the other end.
+    """
+    if config.MODEL_SERVER_AUTHKEY:
+        return config.MODEL_SERVER_AUTHKEY.encode()
+    path = os.path.abspath(config.MODEL_SERVER_KEY_FILE)
+    if create:
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            pass
+        else:
+            with os.fdopen(fd, "w") as f:
+                f.write(secrets.token_hex(32))
+            logger.info(f"Created the model server key {path}")
+    try:
+        mode = os.stat(path).st_mode
+        with open(path, encoding="utf-8") as f:
+            key = f.read().strip()
+    except FileNotFoundError:
+        raise ModelServerError(f"no model server key at {path}: start model_server.py once to create it") from None
+    if os.name == "posix" and mode & (stat.S_IRWXG | stat.S_IRWXO):
+        raise ModelServerError(f"{path} is readable by other users: chmod 600 it")
+    if not key:
+        raise ModelServerError(f"{path} is empty")
+    return key.encode()
+
+
+def attach_shared(name: str) -> shared_memory.SharedMemory:
+    """Open a block created by another process without taking over its lifetime."""
+    shm = shared_memory.SharedMemory(name=name)
+    if os.name == "posix":
+        # the creator unlinks it; otherwise our resource tracker would too, when we exit
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+def shared_array(shm: shared_memory.SharedMemory, spec: ArraySpec) -> np.ndarray:
+    offset, shape, dtype = spec
+    return np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+
+
+class ModelClient:
+    """
+    Connection to model_server.py. detect_bubbles and extract_text_from_bubbles
+    take and return what the core functions of the same name do, so a client
+    can stand in for them (see OcrPipeline's `inference`). Frames and crops
+    are copied into a shared-memory block owned by this client; only boxes,
+    texts and small headers go over the connection. Calls from several
+    threads are serialised on the one connection. close() it when done,
+    which unlinks the shared block.
+    """
+
+    def __init__(self, address=None, authkey: str = None, timeout: float = None):
+        self.address = parse_address(address or config.MODEL_SERVER)
+        self.authkey = authkey.encode() if authkey else load_authkey()
+        self.timeout = config.MODEL_SERVER_TIMEOUT_SEC if timeout is None else timeout
+        self._conn = None
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._resident = None       # (frame, spec) of the frame currently in the block
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._conn is None:
+            self._conn = Client(self.address, authkey=self.authkey)
+            logger.info(f"Connected to model server at {self.address}")
+
+    def _request(self, op: str, **args):
+        """
+        Send one request and wait for its reply; reconnects once if the server
+        was restarted. A reply later than self.timeout drops the connection,
+        so the caller (holding self._lock) is not stuck behind a hung server.
+        """
+        for attempt in (1, 2):
+            try:
+                self._connect()
+                self._conn.send((op, args))
+                if not self._conn.poll(self.timeout):
+                    self._drop()
+                    raise ModelServerError(f"model server at {self.address} did not answer {op} in {self.timeout}s")
+                status, value = self._conn.recv()
+                break
+            except (EOFError, OSError) as e:
+                self._conn = None
+                if attempt == 2:
+                    raise ModelServerError(f"model server at {self.address} unreachable: {e}") from e
+                logger.warning(f"Lost the model server connection ({e}), reconnecting")
+        if status != "ok":
+            raise ModelServerError(value)
+        return value
+
+    def _drop(self):
+        """Abandon the connection and the shared block: the server may still be reading the request from it."""
+        try:
+            self._conn.close()
+        except OSError:
+            pass
+        self._conn = None
+        self._release_shared()
+
+    def _put(self, arrays: List[np.ndarray]) -> List[ArraySpec]:
+        """Copy arrays into the shared block, growing it when needed; returns where each one went."""
+        offsets, size = [], 0
+        for a in arrays:
+            offsets.append(size)
+            size += -(-a.nbytes // SHM_ALIGN) * SHM_ALIGN
+        if self._shm is None or self._shm.size < size:
+            self._release_shared()
+            self._shm = shared_memory.SharedMemory(create=True, size=max(SHM_GROW, -(-size // SHM_GROW) * SHM_GROW))
+        self._resident = None
+        specs = []
+        for a, offset in zip(arrays, offsets):
+            spec = (offset, a.shape, a.dtype.str)
+            shared_array(self._shm, spec)[...] = a
+            specs.append(spec)
+        return specs
+
+    def _put_frame(self, frame: np.ndarray) -> ArraySpec:
+        # detect and the OCR chunks of one cycle send the same frame: copy it once
+        if self._resident is not None and self._resident[0] is frame:
+            return self._resident[1]
+        spec = self._put([frame])[0]
+        self._resident = (frame, spec)
+        return spec
+
+    def _release_shared(self):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+            self._resident = None
+
+    def detect_bubbles(self, image: np.ndarray) -> list:
+        with self._lock, metrics.span("server.detect"):
+            spec = self._put_frame(image)
+            boxes = self._request("detect", shm=self._shm.name, frame=spec)
+        return [(image[y1:y2, x1:x2], (x1, y1, x2, y2)) for x1, y1, x2, y2 in boxes]
+
+    def extract_text_from_bubbles(
+        self,
+        bubble_images: List[Tuple[np.ndarray, Tuple[int, int, int, int]]],
+        mode: str = None,
+        frame: Optional[np.ndarray] = None
+    ) -> list:
+        if not bubble_images:
+            return []
+        boxes = [box for _, box in bubble_images]
+        with self._lock, metrics.span("server.ocr", bubbles=len(bubble_images)):
+            if frame is not None:
+                # crops come from detect_bubbles(frame): the server slices them out of the frame itself
+                spec = self._put_frame(frame)
+                return self._request("ocr", shm=self._shm.name, frame=spec, boxes=boxes, mode=mode)
+            specs = self._put([crop for crop, _ in bubble_images])
+            return self._request("ocr", shm=self._shm.name, crops=specs, boxes=boxes, mode=mode)
+
+    def ping(self) -> dict:
+        with self._lock:
+            return self._request("ping")
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._release_shared()
+
+
+_client: Optional[ModelClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> Optional[ModelClient]:
+    """The process-wide client when config.MODEL_SERVER is set, else None (run the models in-process)."""
+    global _client
+    if not config.MODEL_SERVER:
+        return None
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = ModelClient()
+                atexit.register(_client.close)
+    return _client
@@ -0,0 +1,143 @@
+# core/models.py
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator
+
+import cv2
+import numpy as np
+
+from core import config
+from core.startup import mark
+
+logger = logging.getLogger(__name__)
+
+# name -> loader; models are built on first get() and cached for the process
+_loaders: Dict[str, Callable[[], Any]] = {}
+_models: Dict[str, Any] = {}
+_locks: Dict[str, threading.Lock] = {}
+_run_locks: Dict[str, threading.Lock] = {}
+
+
+def register(name: str, loader: Callable[[], Any]):
+    _loaders[name] = loader
+    _locks[name] = threading.Lock()
+    _run_locks[name] = threading.Lock()
+
+
+def get(name: str) -> Any:
+    """Return the named model, loading it on first use. Concurrent callers wait for one load."""
+    model = _models.get(name)
+    if model is not None:
+        return model
+    with _locks[name]:
+        model = _models.get(name)
+        if model is None:
+            t0 = time.perf_counter()
+            model = _loaders[name]()
+            _models[name] = model
+            logger.info(f"Loaded model {name} in {(time.perf_counter() - t0)*1000:.0f} ms")
+    return model
+
+
+@contextmanager
+def use(name: str) -> Iterator[Any]:
+    """
+    The named model, held exclusively for the block. The YOLO and Paddle
+    predictors are not thread-safe, so warm-up, pipeline and scheduler
+    threads take turns on each model (different models still run in parallel).
+    """
+    model = get(name)
+    with _run_locks[name]:
+        yield model
+
+
+def loaded(name: str) -> bool:
+    return name in _models
+
+
+def _load_ocr():
+    from paddleocr import PaddleOCR
+    return PaddleOCR(
+        text_recognition_model_name=config.OCR_REC_MODEL,
+        text_detection_model_name=config.OCR_DET_MODEL,
+        use_textline_orientation=config.OCR_TEXTLINE_ORIENTATION,
+        text_recognition_batch_size=config.OCR_BATCH_SIZE,
+        device=config.OCR_DEVICE
+    )
+
+
+def _load_text_recognizer():
+    from paddleocr import TextRecognition
+    return TextRecognition(model_name=config.OCR_REC_MODEL, device=config.OCR_DEVICE)
+
+
+def _load_manga_ocr():
+    from manga_ocr import MangaOcr
+    return MangaOcr(force_cpu=not config.OCR_DEVICE.startswith("gpu"))
+
+
+def _load_yolo():
+    from ultralytics import YOLO
+    return YOLO(config.YOLO_MODEL_PATH)
+
+
+def _load_yolo_onnx():
+    import onnxruntime as ort
+    options = ort.SessionOptions()
+    if config.ONNX_THREADS:
+        options.intra_op_num_threads = config.ONNX_THREADS
+    return ort.InferenceSession(config.YOLO_ONNX_PATH, options, providers=["CPUExecutionProvider"])
+
+
+register("ocr", _load_ocr)
+register("text_recognizer", _load_text_recognizer)
+register("manga_ocr", _load_manga_ocr)
+register("yolo", _load_yolo)
+register("yolo_onnx", _load_yolo_onnx)
+
+
+def get_ocr():
+    return get("ocr")
+
+
+def get_text_recognizer():
+    return get("text_recognizer")
+
+
+def get_yolo():
+    return get("yolo")
+
+
+def _dummy_text_image() -> np.ndarray:
+    """White image with a line of dark strokes, so detection finds a box and recognition runs too."""
+    img = np.full((96, 320, 3), 255, np.uint8)
+    cv2.putText(img, "warm up 123", (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 0), 3)
+    return img
+
+
+def warm_up(names: Iterable[str] = ("yolo", "ocr")):
+    """Load each model and run one inference, so the first real cycle pays neither cost."""
+    for name in names:
+        t0 = time.perf_counter()
+        try:
+            if name in ("yolo", "yolo_onnx"):
+                from core.detector import get_detector
+                get_detector().predict(np.zeros((640, 640, 3), np.uint8))
+            elif name in ("ocr", "text_recognizer"):
+                with use(name) as model:
+                    model.predict(_dummy_text_image())
+            else:
+                get(name)
+        except Exception as e:
+            logger.error(f"Warm-up of {name} failed: {e}")
+            continue
+        logger.info(f"Warmed up {name} in {(time.perf_counter() - t0)*1000:.0f} ms")
+        mark(f"{name} warm")
+
+
+def warm_up_async(names: Iterable[str] = ("yolo", "ocr")) -> threading.Thread:
+    t = threading.Thread(target=warm_up, args=(tuple(names),), name="model-warm-up", daemon=True)
+    t.start()
+    return t
@@ -1,19 +1,51 @@
-import cv2
-from paddleocr import PaddleOCR, TextRecognition
 import numpy as np
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 import logging
-from core.capture import enhance_for_ocr_debug
+from core import config, metrics
+from core.ocr_cache import CACHE_PATH, OcrCache, crop_key
+from core.ocr_engine import OcrResult, get_engine
+from core.preprocess import PROFILE, preprocess_crops
+from core.debug_sink import debug_image
 
+logger = logging.getLogger(__name__)
 
-# Initialize OCR
-default_ocr = PaddleOCR(
-    text_recognition_model_name="PP-OCRv5_server_rec",
-    text_detection_model_name="PP-OCRv5_server_det",
-    use_textline_orientation=True,
-    device="gpu:0"
+
+# How a cycle's bubbles are sent to the OCR engine (engine, device and models come from core.config):
+#   "batch"      - all crops through the full det+rec pipeline in one call
+#   "rec_only"   - skip detection, recognise each YOLO-isolated bubble as one line
+#   "per_bubble" - legacy path, one call per crop
+#   "full_page"  - det+rec once on the whole frame, lines assigned to the YOLO bubbles containing them
+OCR_MODE = "batch"
+MIN_SCORE = 0.5
+MIN_LINE_OVERLAP = 0.5    # full_page: share of a line's area that must fall inside a bubble
+
+_NO_TEXT = ("", (0, 0, 0, 0), 0.0)
+_cache: Optional[OcrCache] = (
+    OcrCache(CACHE_PATH if config.OCR_CACHE_PERSIST else None) if config.OCR_CACHE else None
 )
 
+
+def set_cache(cache: Optional[OcrCache]):
+    """Swap the OCR result cache; None disables it."""
+    global _cache
+    _cache = cache
+
+
+def get_cache() -> Optional[OcrCache]:
+    return _cache
+
+
+def _cache_namespace(mode: str) -> str:
+    # everything besides the crop pixels that changes what OCR returns for it
+    return "|".join((get_engine().name, config.OCR_DET_MODEL, config.OCR_REC_MODEL,
+                     mode, PROFILE, str(MIN_SCORE)))
+
+
+def ocr_models(mode: str = None) -> Tuple[str, ...]:
+    """Model names the configured engine needs for `mode`, e.g. to warm them up."""
+    return get_engine().model_names(mode or OCR_MODE)
+
+
 def ocr_single_bubble(
     crop: np.ndarray,
     x_off: int,
@@ -24,112 +56,231 @@ def ocr_single_bubble(
     OCR one bubble crop, merge its vertical lines (top→bottom),
     and return (merged_text, full_image_box, avg_conf).
     """
-    # 1) Run OCR on crop
-    res = default_ocr.predict(crop)
-    if not res or not isinstance(res[0], dict):
+    result = get_engine().recognize([crop])[0]
+    merged = result.filter(min_score).merge(x_off, y_off) if result is not None else None
+    if merged is None:
         return "", (x_off, y_off, x_off, y_off), 0.0
-    r = res[0]
-    texts  = r.get("rec_texts", [])
-    scores = r.get("rec_scores", [])
-    polys  = r.get("rec_polys", [])
-
-    # 2) Collect lines as (y1, text, box, score)
-    lines = []
-    for text, score, poly in zip(texts, scores, polys):
-        if not text or score < min_score:
-            continue
-        xs = [pt[0] for pt in poly]
-        ys = [pt[1] for pt in poly]
-        x1, y1 = int(min(xs)), int(min(ys))
-        x2, y2 = int(max(xs)), int(max(ys))
-        lines.append((y1, text, (x1, y1, x2, y2), score))
+    return merged
 
-    if not lines:
-        return "", (x_off, y_off, x_off, y_off), 0.0
 
-    # 3) Sort top→bottom
-    lines.sort(key=lambda l: l[0])
+def _ocr_batch(crops: List[np.ndarray]) -> List[Optional[OcrResult]]:
+    """Run det+rec on every crop of the cycle in a single batched call."""
+    return get_engine().recognize(crops)
+
+
+def _ocr_per_bubble(crops: List[np.ndarray]) -> List[Optional[OcrResult]]:
+    results = []
+    for idx, crop in enumerate(crops):
+        try:
+            with metrics.span("ocr.bubble", index=idx):
+                results.append(get_engine().recognize([crop])[0])
+        except Exception as e:
+            logger.error("OCR failed on bubble %d: %s", idx, e)
+            results.append(None)
+    return results
 
-    # 4) Merge text inline and average confidence
-    merged_text = "".join(l[1] for l in lines)
-    avg_conf = sum(l[3] for l in lines) / len(lines)
 
-    # 5) Build full-image box
-    x1 = x_off + min(l[2][0] for l in lines)
-    y1 = y_off + min(l[2][1] for l in lines)
-    x2 = x_off + max(l[2][2] for l in lines)
-    y2 = y_off + max(l[2][3] for l in lines)
+def assign_lines_to_bubbles(
+    line_boxes: np.ndarray,
+    bubble_boxes: np.ndarray,
+    min_overlap: float = MIN_LINE_OVERLAP
+) -> np.ndarray:
+    """
+    For each line box (N, 4) return the index of the bubble box (M, 4) that
+    covers the largest share of it, or -1 when no bubble covers min_overlap.
+    Computed as one N x M intersection matrix; a page has at most a few
+    hundred lines and a few dozen bubbles, so no spatial index is needed.
+    """
+    if len(line_boxes) == 0 or len(bubble_boxes) == 0:
+        return np.full(len(line_boxes), -1, dtype=np.int64)
+    lines = line_boxes[:, None, :].astype(np.float64)
+    bubbles = bubble_boxes[None, :, :].astype(np.float64)
+    iw = np.minimum(lines[..., 2], bubbles[..., 2]) - np.maximum(lines[..., 0], bubbles[..., 0])
+    ih = np.minimum(lines[..., 3], bubbles[..., 3]) - np.maximum(lines[..., 1], bubbles[..., 1])
+    inter = np.clip(iw, 0, None) * np.clip(ih, 0, None)
+    area = np.maximum((line_boxes[:, 2] - line_boxes[:, 0]) * (line_boxes[:, 3] - line_boxes[:, 1]), 1)
+    coverage = inter / area[:, None]
+    best = coverage.argmax(axis=1)
+    best[coverage[np.arange(len(best)), best] < min_overlap] = -1
+    return best
 
-    return merged_text, (x1, y1, x2, y2), avg_conf
+
+def _ocr_full_page(
+    frame: np.ndarray,
+    bubble_images: List[Tuple[np.ndarray, Tuple[int, int, int, int]]],
+    min_score: float = MIN_SCORE
+) -> List[Optional[Tuple[str, Tuple[int, int, int, int], float]]]:
+    """
+    One det+rec pass over the whole frame, then each line goes to the bubble
+    containing it and every bubble's lines are merged top to bottom.
+    Lines outside all bubbles (sound effects, captions) are dropped.
+    """
+    with metrics.span("ocr.page"):
+        result = get_engine().recognize([frame])[0]
+    if result is None:
+        logger.warning("Full-page OCR result is empty or invalid.")
+        return [None] * len(bubble_images)
+    lines = result.filter(min_score)
+    with metrics.span("ocr.assign", lines=len(lines)):
+        bubble_boxes = np.array([box for _, box in bubble_images], dtype=np.int64).reshape(-1, 4)
+        owner = assign_lines_to_bubbles(lines.boxes, bubble_boxes)
+    metrics.count("ocr.unassigned_lines", int((owner < 0).sum()))
+    logger.debug("texts: %s", lines.texts)
+
+    merged = [_NO_TEXT] * len(bubble_images)
+    for idx in np.unique(owner[owner >= 0]):
+        merged[idx] = lines.take(np.flatnonzero(owner == idx)).merge()
+    return merged
+
+
+def _ocr_crops(
+    bubble_images: List[Tuple[np.ndarray, Tuple[int, int, int, int]]],
+    mode: str
+) -> List[Optional[Tuple[str, Tuple[int, int, int, int], float]]]:
+    """Preprocess and OCR each crop; per bubble (text, full_image_box, conf), _NO_TEXT, or None on failure."""
+    with metrics.span("preprocess", crops=len(bubble_images)):
+        prepared = preprocess_crops([crop for crop, _ in bubble_images])
+    crops = [crop for crop, _ in prepared]
+    scales = [scale for _, scale in prepared]
+    for idx, ((before, _), after) in enumerate(zip(bubble_images, crops)):
+        debug_image(f"crop_{idx}_before.png", before)
+        debug_image(f"crop_{idx}_after.png", after)
+
+    with metrics.span("ocr", mode=mode, bubbles=len(crops)):
+        results = None
+        if mode == "rec_only":
+            # skip text detection: each YOLO-isolated bubble is recognised as one line
+            try:
+                results = get_engine().recognize_lines(crops)
+            except Exception as e:
+                logger.error("Recognition-only OCR failed: %s", e)
+                results = [None] * len(crops)
+        elif mode == "batch":
+            try:
+                with metrics.span("ocr.batch", bubbles=len(crops)):
+                    results = _ocr_batch(crops)
+            except Exception as e:
+                logger.error("Batched OCR failed, falling back to per-bubble: %s", e)
+        if results is None:
+            results = _ocr_per_bubble(crops)
+
+    merged = []
+    for idx, (result, scale, (_, (x_offset, y_offset, _, _))) in enumerate(zip(results, scales, bubble_images)):
+        if result is None:
+            logger.warning("OCR result for bubble %d is empty or invalid.", idx)
+            merged.append(None)
+            continue
+        logger.debug("texts: %s", result.texts)
+        merged.append(result.filter(MIN_SCORE).merge(x_offset, y_offset, scale) or _NO_TEXT)
+    return merged
 
 
 def extract_text_from_bubbles(
-    bubble_images: List[Tuple[np.ndarray, Tuple[int, int, int, int]]]
+    bubble_images: List[Tuple[np.ndarray, Tuple[int, int, int, int]]],
+    mode: str = None,
+    frame: Optional[np.ndarray] = None
 ) -> List[Tuple[str, Tuple[int, int, int, int], float, int]]:
-    all_blocks = []
+    """
+    OCR every bubble crop of a cycle. By default all crops go through
+    the OCR engine in one batched call (see OCR_MODE). "full_page" needs
+    the frame the bubbles were cropped from and an engine that detects lines
+    (not manga_ocr); it falls back to "batch" otherwise.
+    Crops seen before are answered from the OCR cache and skip OCR entirely.
+    """
+    return extract_text_from_bubbles_many([bubble_images], mode, [frame])[0]
 
-    for idx, (crop, (x_offset, y_offset, _, _)) in enumerate(bubble_images):
-        try:
-            cv2.imwrite(f"debug/crop_{idx}_before.png", crop)
-            crop = enhance_for_ocr_debug(crop)
-            cv2.imwrite(f"debug/crop_{idx}_after.png", crop)
 
-            result = default_ocr.predict(crop)
-            if not result or not isinstance(result[0], dict):
-                logging.warning(f"OCR result for bubble {idx} is empty or invalid.")
-                continue
-# 
-            # logging.debug(f"OCR result for bubble {idx}: {result[0]}")
-            logging.debug(f"texts: {result[0].get('rec_texts', [])}")
+def extract_text_from_bubbles_many(
+    groups: List[List[Tuple[np.ndarray, Tuple[int, int, int, int]]]],
+    mode: str = None,
+    frames: Optional[List[Optional[np.ndarray]]] = None
+) -> List[List[Tuple[str, Tuple[int, int, int, int], float, int]]]:
+    """
+    extract_text_from_bubbles for the bubbles of several frames (e.g. several
+    capture regions) at once: the crops of all groups share one OCR call.
+    Returns one block list per group.
+    """
+    mode = mode or OCR_MODE
+    frames = frames or [None] * len(groups)
+    bubble_images = [bubble for group in groups for bubble in group]
+    if not bubble_images:
+        return [[] for _ in groups]
 
-            r = result[0]
-            texts = r.get("rec_texts", [])
-            scores = r.get("rec_scores", [])
-            polys = r.get("rec_polys", [])
-            angles = r.get("textline_orientation_angles", [])
+    if mode == "full_page" and any(frame is None for frame, group in zip(frames, groups) if group):
+        logger.warning("full_page OCR needs the captured frame, using batch mode")
+        mode = "batch"
+    if mode == "full_page" and not get_engine().detects_lines:
+        # the whole frame would come back as one line, inside no bubble
+        logger.warning("full_page OCR needs line boxes, which the %s engine does not detect; using batch mode",
+                       get_engine().name)
+        mode = "batch"
 
-            lines = []
+    # per bubble: (text, box relative to the crop, conf), text "" when the bubble has none
+    entries: List[Optional[tuple]] = [None] * len(bubble_images)
+    keys = None
+    if _cache is not None:
+        namespace = _cache_namespace(mode)
+        keys = [crop_key(crop, namespace) for crop, _ in bubble_images]
+        cached = _cache.get_many(keys)
+        for idx, key in enumerate(keys):
+            entries[idx] = cached.get(key)
+    todo = [idx for idx, entry in enumerate(entries) if entry is None]
+    metrics.count("ocr.cache_hits", len(entries) - len(todo))
+    metrics.count("ocr.cache_misses", len(todo))
 
-            for text, score, poly, angle in zip(texts, scores, polys, angles):
-                if not text or score < 0.5:
+    if todo:
+        if mode == "full_page":
+            # lines are assigned against every bubble of the frame, so neighbours still claim their own lines
+            page = []
+            for group, frame in zip(groups, frames):
+                if not group:
                     continue
-                xs = [pt[0] for pt in poly]
-                ys = [pt[1] for pt in poly]
-                x1, y1, x2, y2 = int(min(xs)), int(min(ys)), int(max(xs)), int(max(ys))
-                lines.append(((y1, text), (x1, y1, x2, y2), score))
-
-            if lines:
-                # Sort top to bottom
-                lines.sort(key=lambda l: l[0][0])
-
-                bubble_text = [line[0][1] for line in lines]
-                total_conf = sum(l[2] for l in lines)
-                count = len(lines)
-
-                min_x = min(l[1][0] for l in lines)
-                min_y = min(l[1][1] for l in lines)
-                max_x = max(l[1][2] for l in lines)
-                max_y = max(l[1][3] for l in lines)
-
-                merged_text = "".join(bubble_text)
-                conf = total_conf / count
-                x1 = x_offset + min_x
-                y1 = y_offset + min_y
-                x2 = x_offset + max_x
-                y2 = y_offset + max_y
-                all_blocks.append((merged_text, (x1, y1, x2, y2), conf, 1))
-                logging.debug(f"Merged bubble text (sorted): \"{merged_text}\"")
+                with metrics.span("ocr", mode=mode, bubbles=len(group)):
+                    page.extend(_ocr_full_page(frame, group))
+            fresh = [page[idx] for idx in todo]
+        else:
+            fresh = _ocr_crops([bubble_images[idx] for idx in todo], mode)
 
-        except Exception as e:
-            logging.error(f"OCR failed on bubble {idx}: {e}")
-            continue
+        new_entries = []
+        for idx, merged in zip(todo, fresh):
+            if merged is None:
+                continue  # OCR failed: nothing to show, nothing to cache
+            text, (x1, y1, x2, y2), conf = merged
+            x_off, y_off = bubble_images[idx][1][:2]
+            entries[idx] = (text, (x1 - x_off, y1 - y_off, x2 - x_off, y2 - y_off), conf)
+            if keys is not None:
+                new_entries.append((keys[idx], entries[idx]))
+        if new_entries:
+            _cache.put_many(new_entries)
 
-    logging.info(f"Grouped OCR blocks: {len(all_blocks)}")
+    if _cache is not None:
+        stats = _cache.stats()
+        logger.debug(
+            "OCR cache: %d/%d bubbles served (hit rate=%.0f%%)",
+            len(bubble_images) - len(todo), len(bubble_images), stats["hit_rate"] * 100
+        )
+
+    results, start = [], 0
+    for group in groups:
+        all_blocks = []
+        for entry, (_, (x_off, y_off, _, _)) in zip(entries[start:start + len(group)], group):
+            if entry is None or not entry[0]:
+                continue
+            text, (x1, y1, x2, y2), conf = entry
+            all_blocks.append((text, (x1 + x_off, y1 + y_off, x2 + x_off, y2 + y_off), conf, 1))
+            logger.debug("Merged bubble text (sorted): \"%s\"", text)
+        results.append(_sort_blocks(all_blocks))
+        start += len(group)
+    return results
+
+
+def _sort_blocks(all_blocks: list) -> list:
+    logger.info("Grouped OCR blocks: %d", len(all_blocks))
 
     # --- ensure bubbles themselves come out in right-to-left reading order ---
     # each block: (text, (x1,y1,x2,y2), conf, angle)
     all_blocks.sort(key=lambda b: b[1][0], reverse=True)
-    logging.info(f"OCR blocks after right-to-left sort: {all_blocks}")
+    logger.debug("OCR blocks after right-to-left sort: %s", all_blocks)
     return all_blocks
 
 def extract_text_full_image(
@@ -140,20 +291,7 @@ def extract_text_full_image(
     Runs OCR on the whole image. Returns list of
       (text, (x1,y1,x2,y2), score)
     """
-    res = default_ocr.predict(image)
-    if not res or not isinstance(res[0], dict):
+    result = get_engine().recognize([image])[0]
+    if result is None:
         return []
-    r = res[0]
-    texts  = r.get("rec_texts", [])
-    scores = r.get("rec_scores", [])
-    polys  = r.get("rec_polys", [])
-
-    blocks = []
-    for text, score, poly in zip(texts, scores, polys):
-        if not text or score < min_score:
-            continue
-        xs, ys = zip(*poly)
-        x1, y1 = int(min(xs)), int(min(ys))
-        x2, y2 = int(max(xs)), int(max(ys))
-        blocks.append((text, (x1, y1, x2, y2), float(score)))
-    return blocks
\ No newline at end of file
+    return result.filter(min_score).blocks()
@@ -0,0 +1,82 @@
+# core/ocr_cache.py
+import hashlib
+import logging
+import os
+import sys
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from core.sqlite_cache import TwoTierCache
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = os.path.join(os.path.dirname(__file__), '..', 'ocr_cache.sqlite3')
+MEMORY_BUDGET_BYTES = 8 * 1024 * 1024   # in-memory LRU tier, evicted by approximate size
+DISK_MAX_ENTRIES = 50_000
+ENTRY_OVERHEAD = 200                    # key, tuple and dict slot, roughly
+
+# (text, box relative to the crop's top-left corner, confidence); text "" = no text in the bubble
+OcrEntry = Tuple[str, Tuple[int, int, int, int], float]
+
+
+def crop_key(crop: np.ndarray, namespace: str) -> bytes:
+    """
+    Exact content hash of a bubble crop. namespace carries everything else
+    the result depends on (engine, models, mode, preprocessing profile).
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(namespace.encode())
+    h.update(repr(crop.shape).encode())
+    h.update(np.ascontiguousarray(crop).data)
+    return h.digest()
+
+
+class OcrCache(TwoTierCache):
+    """
+    OCR results keyed on crop_key(): a memory LRU bounded by memory_bytes,
+    optionally backed by a SQLite table so revisited pages survive restarts.
+    Pass path=None for a memory-only cache.
+    """
+
+    NAME = "OCR cache"
+    TABLE = "ocr_results"
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS ocr_results (
+        key BLOB PRIMARY KEY,
+        text TEXT NOT NULL,
+        x1 INTEGER, y1 INTEGER, x2 INTEGER, y2 INTEGER,
+        conf REAL NOT NULL,
+        last_used REAL NOT NULL
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_ocr_results_last_used ON ocr_results (last_used);
+    """
+    KEY_COLUMNS = ("key",)
+    VALUE_COLUMNS = ("text", "x1", "y1", "x2", "y2", "conf")
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        memory_bytes: int = MEMORY_BUDGET_BYTES,
+        max_entries: int = DISK_MAX_ENTRIES
+    ):
+        super().__init__(path, memory_bytes, max_entries)
+
+    def _to_row(self, entry: OcrEntry) -> tuple:
+        text, (x1, y1, x2, y2), conf = entry
+        return text, x1, y1, x2, y2, conf
+
+    def _from_row(self, row: tuple) -> OcrEntry:
+        return row[0], tuple(row[1:5]), row[5]
+
+    def _entry_size(self, entry: OcrEntry) -> int:
+        return ENTRY_OVERHEAD + sys.getsizeof(entry[0])
+
+    def get_many(self, keys: Iterable[bytes]) -> Dict[bytes, OcrEntry]:
+        return self._lookup(keys)
+
+    def put_many(self, items: Iterable[Tuple[bytes, OcrEntry]]):
+        self._store(items)
+
+    def stats(self) -> Dict[str, float]:
+        return {**super().stats(), "memory_bytes": self._used}
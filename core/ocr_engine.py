@@ -0,0 +1,195 @@
+# core/ocr_engine.py
+import logging
+import threading
+from typing import List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from core import config, models
+
+logger = logging.getLogger(__name__)
+
+Box = Tuple[int, int, int, int]
+
+
+class OcrResult:
+    """
+    Text lines of one OCR'd image as parallel arrays: texts (list of str),
+    scores (N,) float and boxes (N, 4) int x1, y1, x2, y2 in image pixels.
+    """
+    __slots__ = ("texts", "scores", "boxes")
+
+    def __init__(self, texts: Sequence[str], scores, boxes):
+        self.texts = list(texts)
+        self.scores = np.asarray(scores, dtype=np.float64).reshape(-1)
+        self.boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+
+    @classmethod
+    def empty(cls) -> "OcrResult":
+        return cls([], np.empty(0), np.empty((0, 4)))
+
+    @classmethod
+    def from_polys(cls, texts: Sequence[str], scores, polys) -> "OcrResult":
+        """Boxes are the axis-aligned bounds of each polygon, computed for all lines at once."""
+        if len(polys) == 0:
+            return cls.empty()
+        pts = np.asarray(polys) if len({len(p) for p in polys}) == 1 else None
+        if pts is not None and pts.ndim == 3:
+            boxes = np.concatenate([pts.min(axis=1), pts.max(axis=1)], axis=1)
+        else:
+            # polygons with differing point counts cannot be stacked
+            boxes = np.array([np.r_[np.min(p, axis=0), np.max(p, axis=0)] for p in polys])
+        return cls(texts, scores, boxes.astype(np.int64))
+
+    @classmethod
+    def from_paddle(cls, result) -> Optional["OcrResult"]:
+        """Parse one PaddleOCR pipeline result; None if it is missing or malformed."""
+        if not result or not isinstance(result, dict):
+            return None
+        return cls.from_polys(
+            result.get("rec_texts", []), result.get("rec_scores", []), result.get("rec_polys", [])
+        )
+
+    @classmethod
+    def whole_image(cls, text: str, score: float, shape: Tuple[int, ...]) -> "OcrResult":
+        """A single line covering the whole image, for recognisers that do no detection."""
+        h, w = shape[:2]
+        return cls([text], [score], [(0, 0, w, h)])
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def filter(self, min_score: float) -> "OcrResult":
+        """Keep non-empty lines scoring at least min_score."""
+        keep = self.scores >= min_score
+        keep &= np.fromiter((bool(t) for t in self.texts), bool, len(self.texts))
+        if keep.all():
+            return self
+        return self.take(np.flatnonzero(keep))
+
+    def take(self, idx: np.ndarray) -> "OcrResult":
+        """The lines at the given indices."""
+        return OcrResult([self.texts[i] for i in idx], self.scores[idx], self.boxes[idx])
+
+    def to_image(self, x_offset: int = 0, y_offset: int = 0, scale: float = 1.0) -> np.ndarray:
+        """Boxes mapped back to full-image coordinates: undo the preprocessing scale, add the crop offset."""
+        boxes = self.boxes if scale == 1.0 else (self.boxes / scale).astype(np.int64)
+        return boxes + np.array([x_offset, y_offset, x_offset, y_offset])
+
+    def merge(self, x_offset: int = 0, y_offset: int = 0, scale: float = 1.0) -> Optional[Tuple[str, Box, float]]:
+        """
+        Join the lines top to bottom into (text, full_image_box, avg_conf),
+        or None when there are no lines.
+        """
+        if not len(self):
+            return None
+        order = np.argsort(self.boxes[:, 1], kind="stable")
+        text = "".join(self.texts[i] for i in order)
+        boxes = self.to_image(x_offset, y_offset, scale)
+        x1, y1 = boxes[:, :2].min(axis=0)
+        x2, y2 = boxes[:, 2:].max(axis=0)
+        return text, (int(x1), int(y1), int(x2), int(y2)), float(self.scores.mean())
+
+    def blocks(self, x_offset: int = 0, y_offset: int = 0, scale: float = 1.0) -> List[Tuple[str, Box, float]]:
+        """One (text, full_image_box, score) per line."""
+        boxes = self.to_image(x_offset, y_offset, scale).tolist()
+        return [(t, tuple(b), float(s)) for t, b, s in zip(self.texts, boxes, self.scores)]
+
+
+class OcrEngine:
+    """
+    One OCR backend. recognize() runs detection + recognition and returns
+    one OcrResult (or None on a bad result) per image; recognize_lines()
+    treats each image as a single text line. detects_lines is False for an
+    engine whose recognize() returns each image as one line, without boxes
+    of its own (which "full_page" OCR needs).
+    """
+    name = "base"
+    detects_lines = True
+
+    def recognize(self, images: List[np.ndarray]) -> List[Optional[OcrResult]]:
+        raise NotImplementedError
+
+    def recognize_lines(self, images: List[np.ndarray]) -> List[OcrResult]:
+        raise NotImplementedError
+
+    def model_names(self, mode: str) -> Tuple[str, ...]:
+        """core.models registry names this engine loads in the given OCR mode (for warm-up)."""
+        return ()
+
+
+class PaddleOcrEngine(OcrEngine):
+    name = "paddle"
+
+    def model_names(self, mode: str) -> Tuple[str, ...]:
+        return ("text_recognizer",) if mode == "rec_only" else ("ocr",)
+
+    def recognize(self, images: List[np.ndarray]) -> List[Optional[OcrResult]]:
+        with models.use("ocr") as ocr:
+            results = ocr.predict(images if len(images) > 1 else images[0])
+            return [OcrResult.from_paddle(r) for r in results]
+
+    def recognize_lines(self, images: List[np.ndarray]) -> List[OcrResult]:
+        # rotate tall crops like PaddleOCR does for vertical lines
+        lines = [np.rot90(img) if img.shape[0] >= 1.5 * img.shape[1] else img for img in images]
+        with models.use("text_recognizer") as recognizer:
+            results = list(recognizer.predict(lines, batch_size=config.OCR_BATCH_SIZE))
+        return [
+            OcrResult.whole_image(r.get("rec_text", ""), float(r.get("rec_score", 0.0)), img.shape)
+            for r, img in zip(results, images)
+        ]
+
+
+class MangaOcrEngine(OcrEngine):
+    """
+    manga-ocr (optional dependency, `pip install manga-ocr`). It has no text
+    detector and no confidence, so every image is one line scored 1.0;
+    YOLO's bubble crops are what it is made for.
+    """
+    name = "manga_ocr"
+    detects_lines = False
+
+    def model_names(self, mode: str) -> Tuple[str, ...]:
+        return ("manga_ocr",)
+
+    def _read(self, img: np.ndarray) -> OcrResult:
+        from PIL import Image
+        with models.use("manga_ocr") as manga_ocr:
+            text = manga_ocr(Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB)))
+        return OcrResult.whole_image(text, 1.0, img.shape)
+
+    def recognize(self, images: List[np.ndarray]) -> List[Optional[OcrResult]]:
+        return [self._read(img) for img in images]
+
+    def recognize_lines(self, images: List[np.ndarray]) -> List[OcrResult]:
+        return [self._read(img) for img in images]
+
+
+ENGINES = {
+    PaddleOcrEngine.name: PaddleOcrEngine,
+    MangaOcrEngine.name: MangaOcrEngine,
+}
+
+_engine: Optional[OcrEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> OcrEngine:
+    """The engine named by config.OCR_ENGINE, created on first use."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                name = config.OCR_ENGINE
+                if name not in ENGINES:
+                    logger.warning(f"Unknown OCR engine {name!r}, using {PaddleOcrEngine.name!r}")
+                    name = PaddleOcrEngine.name
+                _engine = ENGINES[name]()
+    return _engine
+
+
+def set_engine(engine: Optional[OcrEngine]):
+    """Swap the OCR engine (None = rebuild from config on next use)."""
+    global _engine
+    _engine = engine
@@ -0,0 +1,394 @@
+# core/pipeline.py
+import cProfile
+import itertools
+from concurrent.futures import Future, wait
+from functools import partial
+import logging
+import queue
+import threading
+import time
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from core import config, debug_sink, metrics, ocr
+from core.history import get_history
+from core.capture import grab_region
+from core.yolo_bubble import detect_bubbles, sort_bubbles_for_japanese
+from core.ocr import extract_text_from_bubbles
+from core.translate import submit_many, translate_batch
+from core.startup import mark
+
+logger = logging.getLogger(__name__)
+
+STAGE_QUEUE_SIZE = 1   # a stage never holds more than one pending cycle
+UI_POLL_MS = 15        # how often the Tk thread drains marshalled UI calls
+STATUS_HIDE_MS = 3000  # final statuses ("Complete!", "No text found.", errors) hide after this long
+CANCEL_POLL_SEC = 0.1  # how often a stage waiting on translations checks whether its cycle was superseded
+
+
+class CycleCancelled(Exception):
+    pass
+
+
+class Cycle:
+    """State of one capture → detect → OCR → translate → render run."""
+    _ids = itertools.count(1)
+
+    def __init__(self, frame: Optional[np.ndarray] = None):
+        self.id = next(self._ids)
+        self.frame = frame
+        self.bubbles = []
+        self.blocks = []
+        self.translations = []
+        self.trace = metrics.tracer.begin(self.id)
+        self.first_bubble = None        # seconds from cycle start to the first bubble on screen
+        # streaming mode: one translation Future per block, and the translations that have arrived
+        self.futures: List[Future] = []
+        self.arrived = {}
+        self.lock = threading.Lock()
+        self.render_pending = False
+        self.sorted = False             # streaming: blocks re-sorted for the final render, no more partial ones
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def check(self):
+        if self._cancelled.is_set():
+            raise CycleCancelled(self.id)
+
+
+def _put_latest(q: queue.Queue, item):
+    """Put without blocking; whatever was waiting in the bounded queue is stale, so drop it."""
+    while True:
+        try:
+            q.put_nowait(item)
+            return
+        except queue.Full:
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                pass
+
+
+class OcrPipeline:
+    """
+    Runs the heavy stages on worker threads connected by bounded queues.
+    Callbacks (on_status, on_blocks, on_result, on_partial, on_cycle_end) always run on
+    the Tk thread: workers marshal them through a queue that the Tk loop drains via root.after.
+    Triggering a new cycle cancels the one in flight.
+
+    With config.STREAM_BUBBLES, the texts go to the translator as soon as OCR returns
+    them (one batched call, or chunks of config.STREAM_OCR_CHUNK bubbles) and
+    on_partial(blocks, translations) is called with every translation that has
+    arrived so far, before on_result gets them all.
+
+    `inference` replaces the module-level detect_bubbles / extract_text_from_bubbles,
+    e.g. with a SchedulerClient when several regions share the models.
+    """
+
+    def __init__(
+        self,
+        root,
+        region: dict,
+        on_status: Callable[[str, Optional[int]], None],
+        on_blocks: Callable[[list], None],
+        on_result: Callable[[list, List[str]], None],
+        on_cycle_end: Optional[Callable[[], None]] = None,
+        on_partial: Optional[Callable[[list, List[str]], None]] = None,
+        inference=None
+    ):
+        self.root = root
+        self.region = region
+        self.on_status = on_status
+        self.on_blocks = on_blocks
+        self.on_result = on_result
+        self.on_cycle_end = on_cycle_end
+        self.on_partial = on_partial
+        self._detect_bubbles = inference.detect_bubbles if inference is not None else detect_bubbles
+        self._extract_text = inference.extract_text_from_bubbles if inference is not None else extract_text_from_bubbles
+
+        self._stages = [
+            ("capture", self._capture),
+            ("detect", self._detect),
+            ("ocr", self._ocr),
+            ("translate", self._translate),
+        ]
+        self._queues = [queue.Queue(maxsize=STAGE_QUEUE_SIZE) for _ in self._stages]
+        self._ui_queue = queue.SimpleQueue()
+        self._current: Optional[Cycle] = None
+        self._lock = threading.Lock()
+        self._ui_due = 0.0
+        self._ui_lag_max = 0.0
+        self._threads = []
+
+    def start(self):
+        for index, (name, fn) in enumerate(self._stages):
+            t = threading.Thread(target=self._run_stage, args=(index, fn), name=f"pipeline-{name}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        self._ui_due = time.perf_counter() + UI_POLL_MS / 1000
+        self.root.after(UI_POLL_MS, self._drain_ui)
+
+    def stop(self):
+        with self._lock:
+            if self._current is not None:
+                self._current.cancel()
+        for q in self._queues:
+            _put_latest(q, None)
+
+    def trigger(self, frame: Optional[np.ndarray] = None) -> Cycle:
+        """Start a new cycle (safe from any thread), cancelling the one in flight."""
+        cycle = Cycle(frame)
+        with self._lock:
+            previous = self._current
+            # only a cycle still in flight is superseded; a finished one just stays on screen
+            if previous is not None and not previous.cancelled and previous.trace.status == "running":
+                previous.cancel()
+                metrics.tracer.finish(previous.trace, "cancelled")
+                logger.info(f"Cancelled OCR cycle {previous.id}, superseded by cycle {cycle.id}")
+            self._current = cycle
+        self._ui_lag_max = 0.0
+        logger.info("Starting OCR cycle %d", cycle.id)
+        _put_latest(self._queues[0], cycle)
+        return cycle
+
+    def ui(self, fn: Callable, *args):
+        """Run fn(*args) on the Tk thread."""
+        self._ui_queue.put((fn, args))
+
+    def _drain_ui(self):
+        now = time.perf_counter()
+        self._ui_lag_max = max(self._ui_lag_max, now - self._ui_due)
+        while True:
+            try:
+                fn, args = self._ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                fn(*args)
+            except Exception:
+                logger.exception("UI callback failed")
+        self._ui_due = time.perf_counter() + UI_POLL_MS / 1000
+        self.root.after(UI_POLL_MS, self._drain_ui)
+
+    def _status(self, cycle: Cycle, message: str, auto_hide_ms: Optional[int] = None):
+        def show():
+            if not cycle.cancelled:
+                self.on_status(message, auto_hide_ms)
+        self.ui(show)
+
+    def _run_stage(self, index: int, fn: Callable[[Cycle], bool]):
+        inbox = self._queues[index]
+        outbox = self._queues[index + 1] if index + 1 < len(self._queues) else None
+        while True:
+            cycle = inbox.get()
+            if cycle is None:
+                return
+            if cycle.cancelled:
+                continue
+            try:
+                with metrics.bind(cycle.trace):
+                    proceed = self._profiled(cycle, fn)
+                cycle.check()
+            except CycleCancelled:
+                logger.info(f"OCR cycle {cycle.id} cancelled during {self._stages[index][0]}")
+                continue
+            except Exception as e:
+                logger.exception(f"OCR cycle {cycle.id} failed in {self._stages[index][0]}")
+                self._status(cycle, f"Error: {e}", STATUS_HIDE_MS)
+                self._finish(cycle, "error")
+                continue
+
+            if proceed is not True:
+                self._finish(cycle, proceed)
+            elif outbox is None:
+                self.ui(self._render, cycle)
+            else:
+                _put_latest(outbox, cycle)
+
+    def _profiled(self, cycle: Cycle, fn: Callable[[Cycle], object]):
+        """Run fn(cycle), under cProfile when this cycle was picked for profiling."""
+        if not cycle.trace.profile:
+            return fn(cycle)
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:
+            # another profiler is active (Python 3.12+ allows only one)
+            logger.warning(f"cProfile unavailable for cycle {cycle.id}: {e}")
+            return fn(cycle)
+        try:
+            return fn(cycle)
+        finally:
+            profiler.disable()
+            cycle.trace.profiles.append(profiler)
+
+    # --- stages (worker threads); return True to continue, or the status the cycle ends with ---
+
+    def _capture(self, cycle: Cycle):
+        self._status(cycle, "Getting image...")
+        debug_sink.new_cycle()
+        with metrics.span("capture", provided=cycle.frame is not None):
+            if cycle.frame is None:
+                cycle.frame = grab_region(self.region)
+        return True
+
+    def _detect(self, cycle: Cycle):
+        self._status(cycle, "Getting bubbles...")
+        with metrics.span("detect"):
+            cycle.bubbles = sort_bubbles_for_japanese(self._detect_bubbles(cycle.frame))
+        metrics.count("bubbles", len(cycle.bubbles))
+        logger.info("Detected %d bubbles", len(cycle.bubbles))
+        if not cycle.bubbles:
+            logger.info("No bubbles detected. Skipping OCR.")
+            self._status(cycle, "No bubbles found.", STATUS_HIDE_MS)
+            return "no_bubbles"
+        return True
+
+    def _ocr(self, cycle: Cycle):
+        self._status(cycle, "Getting texts...")
+        if config.STREAM_BUBBLES:
+            self._ocr_streaming(cycle)
+        else:
+            # preprocess and ocr spans are recorded inside extract_text_from_bubbles
+            cycle.blocks = self._extract_text(cycle.bubbles, frame=cycle.frame)
+        metrics.count("blocks", len(cycle.blocks))
+        metrics.count("chars", sum(len(b[0]) for b in cycle.blocks))
+        if not cycle.blocks:
+            logger.info("No OCR text detected in any bubble. Skipping translation.")
+            self._status(cycle, "No text found.", STATUS_HIDE_MS)
+            return "no_text"
+        logger.info("OCR extracted %d bubbles", len(cycle.blocks))
+        logger.debug("OCR blocks: %s", cycle.blocks)
+        blocks = cycle.blocks
+        self.ui(lambda: cycle.cancelled or self.on_blocks(blocks))
+        return True
+
+    def _ocr_streaming(self, cycle: Cycle):
+        """OCR bubbles a chunk at a time in reading order, handing each chunk's texts to the translator at once."""
+        # full_page reads the whole frame per call, so chunking would repeat it
+        chunk = len(cycle.bubbles) if ocr.OCR_MODE == "full_page" else (config.STREAM_OCR_CHUNK or len(cycle.bubbles))
+        for start in range(0, len(cycle.bubbles), chunk):
+            cycle.check()
+            blocks = self._extract_text(cycle.bubbles[start:start + chunk], frame=cycle.frame)
+            if not blocks:
+                continue
+            futures = submit_many([b[0] for b in blocks])
+            with cycle.lock:
+                first = len(cycle.blocks)
+                cycle.blocks.extend(blocks)
+                cycle.futures.extend(futures)
+                snapshot = list(cycle.blocks)
+            self.ui(lambda: cycle.cancelled or self.on_blocks(snapshot))
+            for offset, future in enumerate(futures):
+                future.add_done_callback(partial(self._bubble_translated, cycle, first + offset))
+
+    def _bubble_translated(self, cycle: Cycle, index: int, future: Future):
+        """Translator thread: note the arrival and schedule one coalesced partial redraw."""
+        if cycle.cancelled:
+            return
+        with cycle.lock:
+            if cycle.sorted:
+                return
+            cycle.arrived[index] = _translation(future)
+            schedule, cycle.render_pending = not cycle.render_pending, True
+        if schedule:
+            self.ui(self._render_partial, cycle)
+
+    def _translate(self, cycle: Cycle):
+        self._status(cycle, "Getting translations...")
+        with metrics.span("translate"):
+            if config.STREAM_BUBBLES:
+                self._wait_translations(cycle)
+                self._sort_streamed(cycle)
+                cycle.translations = [_translation(f) for f in cycle.futures]
+            else:
+                cycle.translations = translate_batch([b[0] for b in cycle.blocks])
+        logger.info("Translation complete")
+        if config.HISTORY:
+            # only enqueues; thumbnails and inserts happen on the history writer thread
+            get_history().record(cycle.blocks, cycle.translations, cycle.frame)
+        return True
+
+    def _wait_translations(self, cycle: Cycle):
+        """Wait for the streamed translations; a superseded cycle stops waiting and drops the ones not sent yet."""
+        pending = set(cycle.futures)
+        while pending:
+            if cycle.cancelled:
+                for future in pending:
+                    future.cancel()
+                cycle.check()
+            _, pending = wait(pending, timeout=CANCEL_POLL_SEC)
+
+    def _sort_streamed(self, cycle: Cycle):
+        """Chunks are each sorted right to left; put the whole page in that order, as the batch path has it."""
+        with cycle.lock:
+            order = sorted(range(len(cycle.blocks)), key=lambda i: cycle.blocks[i][1][0], reverse=True)
+            cycle.blocks = [cycle.blocks[i] for i in order]
+            cycle.futures = [cycle.futures[i] for i in order]
+            # arrival indices refer to the old order; the final render is next, so partial ones stop here
+            cycle.sorted = True
+
+    # --- render (Tk thread) ---
+
+    def _render_partial(self, cycle: Cycle):
+        if cycle.cancelled or cycle.trace.status != "running":
+            return  # a late redraw must not replace the final, complete one
+        with cycle.lock:
+            cycle.render_pending = False
+            if cycle.sorted:
+                return
+            arrived = sorted(cycle.arrived.items())
+            blocks = [cycle.blocks[i] for i, _ in arrived]
+        translations = [t for _, t in arrived]
+        with metrics.bind(cycle.trace):
+            with metrics.span("render.partial", bubbles=len(blocks)):
+                (self.on_partial or self.on_result)(blocks, translations)
+        self._first_bubble_shown(cycle)
+
+    def _first_bubble_shown(self, cycle: Cycle):
+        if cycle.first_bubble is None:
+            cycle.first_bubble = time.perf_counter() - cycle.trace.t0
+            cycle.trace.gauge("first_bubble_ms", cycle.first_bubble * 1000)
+            mark("first translation shown")
+
+    def _render(self, cycle: Cycle):
+        if cycle.cancelled:
+            return
+        with metrics.bind(cycle.trace):
+            with metrics.span("render"):
+                self._profiled(cycle, lambda c: self.on_result(c.blocks, c.translations))
+        logger.info("Overlay updated")
+        self.on_status("Complete!", STATUS_HIDE_MS)
+        self._first_bubble_shown(cycle)
+        self._finish(cycle, "ok")
+
+    def _finish(self, cycle: Cycle, status: str):
+        """End the cycle's trace on every exit path, including the early ones, and log its stages."""
+        trace = cycle.trace
+        trace.gauge("ui_lag_max_ms", self._ui_lag_max * 1000)
+        metrics.tracer.finish(trace, status)
+        if self.on_cycle_end is not None:
+            self.ui(self.on_cycle_end)
+        logger.info(
+            f"Cycle {cycle.id} {status}: "
+            + ", ".join(f"{k}={v:.1f}ms" for k, v in trace.stage_ms().items())
+            + (f", first bubble={cycle.first_bubble*1000:.1f}ms" if cycle.first_bubble is not None else "")
+            + f", total={trace.total*1000:.1f}ms, max UI frame lag={self._ui_lag_max*1000:.1f}ms"
+            + (", " + ", ".join(f"{k}={v:g}" for k, v in trace.counters.items()) if trace.counters else "")
+        )
+
+
+def _translation(future: Future) -> str:
+    """A translation Future's text; failures become "" like in translate_batch."""
+    try:
+        return future.result()
+    except Exception as e:
+        logger.error("Translation failed: %s", e)
+        return ""
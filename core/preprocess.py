@@ -0,0 +1,133 @@
+# core/preprocess.py
+import os
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+
+from core.debug_sink import debug_enabled, debug_image
+
+logger = logging.getLogger(__name__)
+
+TARGET_MIN = 200          # crops whose short side is below this are upscaled
+PROFILE = "full"          # default profile for the OCR stage
+WORKERS = min(4, os.cpu_count() or 1)
+
+# name -> settings; every profile ends in a 3-channel BGR image for PaddleOCR
+PROFILES = {
+    "raw":   {"upscale": False, "gray": False, "clahe": False, "binarize": False},
+    "gray":  {"upscale": True, "interp": cv2.INTER_CUBIC, "gray": True, "clahe": False, "binarize": False},
+    "clahe": {"upscale": True, "interp": cv2.INTER_CUBIC, "gray": True, "clahe": True, "binarize": False},
+    "fast":  {"upscale": True, "interp": cv2.INTER_CUBIC, "gray": True, "clahe": True, "binarize": True},
+    # same steps and interpolation as enhance_for_ocr_debug always used
+    "full":  {"upscale": True, "interp": cv2.INTER_LANCZOS4, "gray": True, "clahe": True, "binarize": True},
+}
+
+# immutable, safe to share between threads
+_DILATE_KERNEL = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2))
+
+# CLAHE objects keep internal state, and scratch buffers are reused: one set per worker thread
+_local = threading.local()
+_pool = None
+
+
+def _clahe() -> "cv2.CLAHE":
+    clahe = getattr(_local, "clahe", None)
+    if clahe is None:
+        clahe = _local.clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+    return clahe
+
+
+def _scratch(name: str, shape: tuple) -> np.ndarray:
+    """Contiguous view over a per-thread buffer that only grows, reused across crops."""
+    buffers = getattr(_local, "buffers", None)
+    if buffers is None:
+        buffers = _local.buffers = {}
+    size = int(np.prod(shape))
+    buf = buffers.get(name)
+    if buf is None or buf.size < size:
+        buf = buffers[name] = np.empty(max(size, 256 * 256 * 3), dtype=np.uint8)
+    return buf[:size].reshape(shape)
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="preprocess")
+    return _pool
+
+
+def preprocess_crop(
+    crop: np.ndarray,
+    profile: str = PROFILE,
+    debug_dir: str = "ocr_steps"
+) -> Tuple[np.ndarray, float]:
+    """
+    Prepare one bubble crop for OCR. Returns (bgr_image, scale) where scale
+    is the upscale factor applied, so OCR boxes can be mapped back to the crop.
+    The returned image is freshly allocated; intermediates live in reused buffers.
+    """
+    settings = PROFILES[profile]
+    save_steps = debug_enabled(2)
+    step = 0
+
+    def save(step_name: str, image: np.ndarray):
+        nonlocal step
+        if save_steps:
+            debug_image(os.path.join(debug_dir, f"{step:02d}_{step_name}.png"), image, level=2)
+        step += 1
+
+    save("original", crop)
+    img = crop
+    scale = 1.0
+
+    h, w = img.shape[:2]
+    if settings["upscale"] and min(h, w) < TARGET_MIN:
+        scale = TARGET_MIN / min(h, w)
+        size = (max(1, round(w * scale)), max(1, round(h * scale)))
+        img = cv2.resize(img, size, dst=_scratch("upscaled", (size[1], size[0]) + img.shape[2:]),
+                         interpolation=settings["interp"])
+        save("upscaled", img)
+
+    if not settings["gray"]:
+        return np.ascontiguousarray(img) if img is crop else img.copy(), scale
+
+    h, w = img.shape[:2]
+    gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY, dst=_scratch("gray", (h, w)))
+    save("gray", gray)
+
+    if settings["clahe"]:
+        gray = _clahe().apply(gray, dst=_scratch("clahe", (h, w)))
+        save("clahe", gray)
+
+    if settings["binarize"]:
+        gray = cv2.adaptiveThreshold(
+            gray, 255,
+            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+            cv2.THRESH_BINARY,
+            blockSize=15,
+            C=5,
+            dst=_scratch("threshold", (h, w))
+        )
+        save("adapt_th_on_clahe", gray)
+        # thickens thin strokes
+        gray = cv2.dilate(gray, _DILATE_KERNEL, dst=_scratch("dilated", (h, w)), iterations=1)
+        save("dilated", gray)
+
+    # back to BGR so PaddleOCR can accept it
+    final_bgr = cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+    save("final_bgr", final_bgr)
+    return final_bgr, scale
+
+
+def preprocess_crops(crops: List[np.ndarray], profile: str = PROFILE) -> List[Tuple[np.ndarray, float]]:
+    """Preprocess a cycle's crops in parallel; OpenCV releases the GIL. Order is preserved."""
+    if profile not in PROFILES:
+        logger.warning(f"Unknown preprocessing profile {profile!r}, using {PROFILE!r}")
+        profile = PROFILE
+    if len(crops) <= 1 or WORKERS <= 1:
+        return [preprocess_crop(c, profile) for c in crops]
+    return list(_get_pool().map(lambda c: preprocess_crop(c, profile), crops))
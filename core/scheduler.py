@@ -0,0 +1,154 @@
+# core/scheduler.py
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core import config, metrics, ocr
+from core.yolo_bubble import detect_bubbles_batch
+
+logger = logging.getLogger(__name__)
+
+
+class _Job:
+    __slots__ = ("kind", "args", "future")
+
+    def __init__(self, kind: tuple, args: tuple):
+        self.kind = kind
+        self.args = args
+        self.future = Future()
+
+
+class InferenceScheduler:
+    """
+    One worker thread that runs the detector and the OCR engine for every
+    capture region, so the models are loaded and used once whatever the
+    number of regions. Each region queues its requests through its own
+    client(); the worker serves the regions round-robin, and the requests
+    of the same kind waiting at that moment go through the model in one
+    call (detect_bubbles_batch / extract_text_from_bubbles_many).
+    """
+
+    def __init__(self, window_ms: float = None):
+        self.window = (config.SCHEDULE_WINDOW_MS if window_ms is None else window_ms) / 1000
+        self._pending: Dict[str, Deque[_Job]] = {}
+        self._order: List[str] = []
+        self._next = 0
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    def client(self, name: str) -> "SchedulerClient":
+        with self._cond:
+            if name not in self._pending:
+                self._pending[name] = deque()
+                self._order.append(name)
+        return SchedulerClient(self, name)
+
+    def remove_client(self, name: str):
+        """Forget a client that has gone away (its queued jobs, if any, are dropped)."""
+        with self._cond:
+            if self._pending.pop(name, None) is not None:
+                self._order.remove(name)
+                self._next = 0
+
+    def clients(self) -> List[str]:
+        with self._cond:
+            return list(self._order)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="inference-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    def submit(self, name: str, kind: tuple, *args) -> Future:
+        job = _Job(kind, args)
+        with self._cond:
+            self._pending[name].append(job)
+            self._cond.notify()
+        return job.future
+
+    def _take(self) -> List[_Job]:
+        """
+        Starting after the region served first last time, the oldest job of
+        the first region with work sets the kind; every region whose oldest
+        job is of that kind contributes it. One job per region per batch.
+        """
+        names = self._order[self._next:] + self._order[:self._next]
+        kind = next(self._pending[n][0].kind for n in names if self._pending[n])
+        jobs = [self._pending[n].popleft() for n in names if self._pending[n] and self._pending[n][0].kind == kind]
+        self._next = (self._next + 1) % len(self._order)
+        return jobs
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped and not any(self._pending.values()):
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                # regions triggered together (F8, one page turn across a spread) land in the same batch;
+                # nothing to wait for once every region has work queued
+                wait = self.window and not all(self._pending.values())
+            if wait:
+                time.sleep(self.window)
+            with self._cond:
+                # a client may have been removed, with its jobs, meanwhile
+                jobs = self._take() if any(self._pending.values()) else []
+            if jobs:
+                self._execute(jobs)
+            jobs = None  # do not hold on to the inputs (frames, shared-memory views) while idle
+
+    def _execute(self, jobs: List[_Job]):
+        kind = jobs[0].kind
+        try:
+            if kind[0] == "detect":
+                results = detect_bubbles_batch([job.args[0] for job in jobs])
+            else:
+                results = ocr.extract_text_from_bubbles_many(
+                    [job.args[0] for job in jobs], kind[1], [job.args[1] for job in jobs]
+                )
+        except Exception as e:
+            for job in jobs:
+                job.future.set_exception(e)
+            return
+        if len(jobs) > 1:
+            logger.debug("Scheduler ran %s for %d regions in one call", kind[0], len(jobs))
+        for job, result in zip(jobs, results):
+            job.future.set_result((result, len(jobs)))
+
+
+class SchedulerClient:
+    """One region's handle on the scheduler; drop-in for detect_bubbles and extract_text_from_bubbles."""
+
+    def __init__(self, scheduler: InferenceScheduler, name: str):
+        self.scheduler = scheduler
+        self.name = name
+
+    def _call(self, kind: tuple, *args):
+        with metrics.span(f"sched.{kind[0]}"):
+            result, batched = self.scheduler.submit(self.name, kind, *args).result()
+        metrics.count("sched.batched_regions", batched)
+        return result
+
+    def detect_bubbles(self, image: np.ndarray) -> list:
+        return self._call(("detect",), image)
+
+    def extract_text_from_bubbles(
+        self,
+        bubble_images: List[Tuple[np.ndarray, Tuple[int, int, int, int]]],
+        mode: str = None,
+        frame: Optional[np.ndarray] = None
+    ) -> list:
+        if not bubble_images:
+            return []
+        return self._call(("ocr", mode or ocr.OCR_MODE), bubble_images, frame)
@@ -0,0 +1,205 @@
+# core/sqlite_cache.py
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PRUNE_EVERY_PUTS = 500         # disk rows written between two prunes
+BUSY_TIMEOUT_SEC = 5.0         # wait this long for another process's write lock (batch workers share the file)
+
+
+class TwoTierCache:
+    """
+    An in-memory LRU in front of an optional SQLite table that survives
+    restarts; the base of the translation and OCR caches. Subclasses name the
+    table and its columns and convert entries to and from rows. The memory
+    tier is bounded by the summed _entry_size() of its entries (1 each by
+    default, i.e. an entry count); the disk tier by max_entries and, when
+    given, max_age_days since last use. Disk errors (e.g. a database locked
+    by another process) degrade to misses and memory-only writes.
+    """
+
+    NAME = "cache"
+    TABLE = ""
+    SCHEMA = ""                            # CREATE TABLE/INDEX statements; the table needs a last_used column
+    KEY_COLUMNS: Tuple[str, ...] = ()
+    VALUE_COLUMNS: Tuple[str, ...] = ()    # read back into an entry by _from_row
+    EXTRA_COLUMNS: Tuple[str, ...] = ()    # only written, e.g. created
+
+    def __init__(
+        self,
+        path: Optional[str],
+        memory_limit: int,
+        max_entries: int,
+        max_age_days: Optional[float] = None
+    ):
+        self.memory_limit = memory_limit
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._used = 0
+        self._lock = threading.Lock()
+        self._puts_since_prune = 0
+        self._conn = None
+
+        where = " AND ".join(f"{c}=?" for c in self.KEY_COLUMNS)
+        self._select_sql = f"SELECT {', '.join(self.VALUE_COLUMNS)} FROM {self.TABLE} WHERE {where}"
+        self._touch_sql = f"UPDATE {self.TABLE} SET last_used=? WHERE {where}"
+        columns = self.KEY_COLUMNS + self.VALUE_COLUMNS + self.EXTRA_COLUMNS + ("last_used",)
+        self._insert_sql = (f"INSERT OR REPLACE INTO {self.TABLE} ({', '.join(columns)}) "
+                            f"VALUES ({', '.join('?' * len(columns))})")
+
+        if path is not None:
+            try:
+                self._conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_SEC, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+                self._conn.executescript(self.SCHEMA)
+                self._conn.commit()
+                self.prune()
+            except sqlite3.Error as e:
+                logger.error(f"{self.NAME} disabled on disk ({path}): {e}")
+                self._conn = None
+
+    # --- what subclasses define ---
+
+    def _key_params(self, key) -> tuple:
+        return key if isinstance(key, tuple) else (key,)
+
+    def _to_row(self, entry) -> tuple:
+        """VALUE_COLUMNS + EXTRA_COLUMNS values of an entry."""
+        raise NotImplementedError
+
+    def _from_row(self, row: tuple):
+        raise NotImplementedError
+
+    def _entry_size(self, entry) -> int:
+        return 1
+
+    # --- shared machinery ---
+
+    def _remember(self, key, entry):
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._used -= self._entry_size(old)
+        self._memory[key] = entry
+        self._used += self._entry_size(entry)
+        while self._used > self.memory_limit and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._used -= self._entry_size(evicted)
+
+    def _lookup(self, keys: Iterable) -> Dict[Any, Any]:
+        """{key: entry} for every key found in either tier; each distinct key counts once."""
+        found = {}
+        missing = []
+        with self._lock:
+            for key in keys:
+                if key in found or key in missing:
+                    continue
+                entry = self._memory.get(key)
+                if entry is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = entry
+                    self.hits += 1
+                else:
+                    missing.append(key)
+
+            if missing and self._conn is not None:
+                try:
+                    self._disk_lookup(missing, found)
+                except sqlite3.OperationalError as e:
+                    # e.g. locked by another process past the busy timeout: what is left counts as misses
+                    logger.warning(f"{self.NAME} lookup on disk failed: {e}")
+                    self._conn.rollback()
+
+            self.misses += sum(1 for key in missing if key not in found)
+        return found
+
+    def _disk_lookup(self, missing: list, found: dict):
+        now = time.time()
+        for key in missing:
+            params = self._key_params(key)
+            row = self._conn.execute(self._select_sql, params).fetchone()
+            if row is None:
+                continue
+            entry = self._from_row(row)
+            found[key] = entry
+            self._remember(key, entry)
+            self.hits += 1
+            self.disk_hits += 1
+            self._conn.execute(self._touch_sql, (now, *params))
+        self._conn.commit()
+
+    def _store(self, items: Iterable[Tuple[Any, Any]]):
+        now = time.time()
+        rows = []
+        with self._lock:
+            for key, entry in items:
+                self._remember(key, entry)
+                rows.append((*self._key_params(key), *self._to_row(entry), now))
+            if rows and self._conn is not None:
+                try:
+                    self._conn.executemany(self._insert_sql, rows)
+                    self._conn.commit()
+                    self._puts_since_prune += len(rows)
+                except sqlite3.OperationalError as e:
+                    # the memory tier still has them; only persistence is lost
+                    logger.warning(f"{self.NAME} write to disk failed: {e}")
+                    self._conn.rollback()
+
+        if self._puts_since_prune >= PRUNE_EVERY_PUTS:
+            self.prune()
+
+    def prune(self):
+        """Evict disk rows older than max_age_days, then the least recently used beyond max_entries."""
+        if self._conn is None:
+            return
+        keys = ", ".join(self.KEY_COLUMNS)
+        with self._lock:
+            try:
+                if self.max_age_days is not None:
+                    cutoff = time.time() - self.max_age_days * 86400
+                    self._conn.execute(f"DELETE FROM {self.TABLE} WHERE last_used < ?", (cutoff,))
+                self._conn.execute(
+                    f"""DELETE FROM {self.TABLE} WHERE ({keys}) IN (
+                        SELECT {keys} FROM {self.TABLE}
+                        ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                    )""",
+                    (self.max_entries,)
+                )
+                self._conn.commit()
+            except sqlite3.OperationalError as e:
+                logger.warning(f"{self.NAME} prune failed: {e}")
+                self._conn.rollback()
+            self._puts_since_prune = 0
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+        }
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._used = 0
+            if self._conn is not None:
+                self._conn.execute(f"DELETE FROM {self.TABLE}")
+                self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,26 @@
+# core/startup.py
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_T0 = time.perf_counter()
+_marks = {}
+_lock = threading.Lock()
+
+
+def mark(label: str, once: bool = True) -> float:
+    """Log seconds since the process imported this module; with once=True, repeats are ignored."""
+    elapsed = time.perf_counter() - _T0
+    with _lock:
+        if once and label in _marks:
+            return _marks[label]
+        _marks[label] = elapsed
+    logger.info(f"[startup] {label}: {elapsed*1000:.0f} ms")
+    return elapsed
+
+
+def marks() -> dict:
+    with _lock:
+        return dict(_marks)
@@ -1,16 +1,96 @@
-from deep_translator import GoogleTranslator
+from concurrent.futures import Future
+from functools import partial
 from typing import List
 import logging
+from core import metrics
+from core.translation_cache import TranslationCache
+from core.translation_engine import RateLimiter, TranslationEngine, TranslatorBackend
 
+logger = logging.getLogger(__name__)
 
-def translate_batch(texts: List[str]) -> List[str]:
-    results = []
+_cache = TranslationCache()
+_engine = None
+_rate_limit = None
+
+
+def get_engine() -> TranslationEngine:
+    global _engine
+    if _engine is None:
+        _engine = TranslationEngine()
+    return _engine
+
+
+def set_backend(backend: TranslatorBackend):
+    """Swap the translation backend, e.g. StubBackend for offline runs."""
+    global _engine
+    if _engine is not None:
+        _engine.shutdown()
+    _engine = TranslationEngine(backend)
+    if _rate_limit is not None:
+        _engine.limiter = RateLimiter(*_rate_limit)
+
+
+def set_rate_limit(rate_per_sec: float, burst: int):
+    """Limit this process's requests, e.g. to its share of RATE_PER_SEC when several processes translate."""
+    global _rate_limit
+    _rate_limit = (rate_per_sec, burst)
+    get_engine().limiter = RateLimiter(rate_per_sec, burst)
+
+
+def set_cache(cache: TranslationCache):
+    """Swap the translation cache, e.g. TranslationCache(path=None, memory_entries=0) to disable it."""
+    global _cache
+    _cache = cache
+
+
+def translate_batch(texts: List[str], source: str = 'ja', target: str = 'en') -> List[str]:
+    cached = _cache.get_many(texts, source, target)
+    served = sum(1 for t in texts if t in cached)
+
+    # Each distinct miss is requested once; the engine packs them into as few requests as it can
+    misses = list(dict.fromkeys(t for t in texts if t not in cached))
+    metrics.count("translate.cache_hits", served)
+    metrics.count("translate.cache_misses", len(misses))
+    if misses:
+        translations = get_engine().translate_many(misses, source, target)
+        for t, result in zip(misses, translations):
+            logger.debug('Translated: %s -> %s', t, result)
+            cached[t] = result
+        _cache.put_many(zip(misses, translations), source, target)
+
+    stats = _cache.stats()
+    logger.info(
+        "Translation cache: %d/%d served from cache (total hits=%d, misses=%d, hit rate=%.0f%%)",
+        served, len(texts), stats["hits"], stats["misses"], stats["hit_rate"] * 100
+    )
+    return [cached[t] for t in texts]
+
+
+def submit_many(texts: List[str], source: str = 'ja', target: str = 'en') -> List[Future]:
+    """
+    Streaming counterpart of translate_batch: one Future per text, in input
+    order. Cache hits come back already resolved; the distinct misses go to
+    the engine together and each is cached when it arrives. A failed request's Future
+    raises; callers treat that like translate_batch's "".
+    """
+    cached = _cache.get_many(texts, source, target)
+    metrics.count("translate.cache_hits", sum(1 for t in texts if t in cached))
+    futures = {}
     for t in texts:
-        try:
-            result = GoogleTranslator(source='ja', target='en').translate(t)
-            logging.debug(f'Translated: {t} -> {result}')
-            results.append(result)
-        except Exception as e:
-            logging.error(f"Google Translate batch error: {e}, text={t}")
-            results.append("")
-    return results
+        if t in cached and t not in futures:
+            futures[t] = Future()
+            futures[t].set_result(cached[t])
+    misses = list(dict.fromkeys(t for t in texts if t not in cached))
+    metrics.count("translate.cache_misses", len(misses))
+    if misses:
+        # the engine coalesces the misses into as few requests as it can
+        for t, future in zip(misses, get_engine().submit_many(misses, source, target)):
+            future.add_done_callback(partial(_cache_result, t, source, target))
+            futures[t] = future
+    return [futures[t] for t in texts]
+
+
+def _cache_result(text: str, source: str, target: str, future: Future):
+    if not future.cancelled() and future.exception() is None:
+        logger.debug('Translated: %s -> %s', text, future.result())
+        _cache.put(text, source, target, future.result())
@@ -0,0 +1,82 @@
+# core/translation_cache.py
+import os
+import time
+import unicodedata
+import logging
+from typing import Dict, Iterable, Optional, Tuple
+
+from core.sqlite_cache import TwoTierCache
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = os.path.join(os.path.dirname(__file__), '..', 'translation_cache.sqlite3')
+MEMORY_ENTRIES = 4096          # in-memory LRU tier
+DISK_MAX_ENTRIES = 200_000     # on-disk tier, oldest-used rows evicted first
+DISK_MAX_AGE_DAYS = 90         # rows not used for this long are evicted
+
+
+def normalize_text(text: str) -> str:
+    """
+    Canonical cache key for OCR output: NFKC folds full-/half-width variants
+    (！？ vs !?, ｱ vs ア) and whitespace runs are collapsed.
+    """
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+class TranslationCache(TwoTierCache):
+    """
+    Two-tier translation cache keyed on (source, target, normalized text):
+    an in-memory LRU in front of a SQLite table that survives restarts.
+    Pass path=None for a memory-only cache.
+    """
+
+    NAME = "Translation cache"
+    TABLE = "translations"
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS translations (
+        source TEXT NOT NULL,
+        target TEXT NOT NULL,
+        text TEXT NOT NULL,
+        translation TEXT NOT NULL,
+        created REAL NOT NULL,
+        last_used REAL NOT NULL,
+        PRIMARY KEY (source, target, text)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_translations_last_used ON translations (last_used);
+    """
+    KEY_COLUMNS = ("source", "target", "text")
+    VALUE_COLUMNS = ("translation",)
+    EXTRA_COLUMNS = ("created",)
+
+    def __init__(
+        self,
+        path: Optional[str] = CACHE_PATH,
+        memory_entries: int = MEMORY_ENTRIES,
+        max_entries: int = DISK_MAX_ENTRIES,
+        max_age_days: float = DISK_MAX_AGE_DAYS
+    ):
+        super().__init__(path, memory_entries, max_entries, max_age_days)
+
+    def _to_row(self, translation: str) -> tuple:
+        return translation, time.time()
+
+    def _from_row(self, row: tuple) -> str:
+        return row[0]
+
+    def get_many(self, texts: Iterable[str], source: str, target: str) -> Dict[str, str]:
+        """Return {original_text: translation} for every text found in either tier."""
+        keys = {text: (source, target, normalize_text(text)) for text in texts}
+        found = self._lookup(keys.values())
+        return {text: found[key] for text, key in keys.items() if key in found}
+
+    def get(self, text: str, source: str, target: str) -> Optional[str]:
+        return self.get_many([text], source, target).get(text)
+
+    def put_many(self, pairs: Iterable[Tuple[str, str]], source: str, target: str):
+        """Store (original_text, translation) pairs. Empty translations are not cached."""
+        self._store(
+            ((source, target, normalize_text(text)), translation) for text, translation in pairs if translation
+        )
+
+    def put(self, text: str, source: str, target: str, translation: str):
+        self.put_many([(text, translation)], source, target)
@@ -0,0 +1,332 @@
+# core/translation_engine.py
+import random
+import threading
+import time
+import logging
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, List, Optional
+from urllib.parse import quote_plus
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKERS = 8
+RATE_PER_SEC = 10.0    # sustained requests per second across all translate threads (batch workers split it)
+RATE_BURST = 10
+RETRIES = 3
+BACKOFF_SEC = 0.5      # first retry delay, doubled each attempt (with jitter)
+TIMEOUT_SEC = 10.0
+PACK_MAX_SIZE = 4000   # request budget for packed texts in the backend's request_size() units (0 = one per text)
+PACK_DELIMITER = "\n"  # line breaks survive translation, so one line in = one line out
+
+
+class TranslatorBackend:
+    """
+    One translation request. Implementations must be safe to call from several threads.
+    supports_packing means line breaks come back one-for-one, so several texts
+    can share a request (see TranslationEngine.submit_many).
+    """
+    name = "base"
+    supports_packing = False
+
+    def translate(self, text: str, source: str, target: str) -> str:
+        raise NotImplementedError
+
+    def request_size(self, text: str) -> int:
+        """What text costs against PACK_MAX_SIZE when packed into a request."""
+        return len(text)
+
+    def close(self):
+        pass
+
+
+class GoogleBackend(TranslatorBackend):
+    """
+    Google Translate's public "gtx" endpoint over one requests.Session, so
+    every worker reuses pooled keep-alive connections instead of opening a
+    fresh HTTPS session per string.
+    """
+    name = "google"
+    supports_packing = True
+    URL = "https://translate.googleapis.com/translate_a/single"
+
+    def __init__(self, pool_size: int = MAX_WORKERS, timeout: float = TIMEOUT_SEC):
+        self.timeout = timeout
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self._session.mount("https://", adapter)
+
+    def request_size(self, text: str) -> int:
+        # q goes in the GET URL percent-encoded: a Japanese character is 9 bytes there
+        return len(quote_plus(text))
+
+    def translate(self, text: str, source: str, target: str) -> str:
+        resp = self._session.get(
+            self.URL,
+            params={"client": "gtx", "sl": source, "tl": target, "dt": "t", "q": text},
+            timeout=self.timeout
+        )
+        resp.raise_for_status()
+        data = resp.json()
+        return "".join(seg[0] for seg in data[0] if seg and seg[0])
+
+    def close(self):
+        self._session.close()
+
+
+class StubBackend(TranslatorBackend):
+    """
+    Offline backend for tests and benchmarks: sleeps `latency` seconds to
+    mimic a round-trip and returns each line with a prefix. Every
+    `fail_every`-th call raises, to exercise the retry path, and every
+    `merge_every`-th multi-line call joins its lines, like a translator
+    that reflows text, to exercise the unpacking fallback.
+    """
+    name = "stub"
+    supports_packing = True
+
+    def __init__(self, latency: float = 0.0, prefix: str = "[en] ", fail_every: int = 0, merge_every: int = 0):
+        self.latency = latency
+        self.prefix = prefix
+        self.fail_every = fail_every
+        self.merge_every = merge_every
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def translate(self, text: str, source: str, target: str) -> str:
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+        if self.latency:
+            time.sleep(self.latency)
+        if self.fail_every and call % self.fail_every == 0:
+            raise ConnectionError(f"stub failure on call {call}")
+        lines = [f"{self.prefix}{line}" for line in text.split(PACK_DELIMITER)]
+        if self.merge_every and len(lines) > 1 and call % self.merge_every == 0:
+            return " ".join(lines)
+        return PACK_DELIMITER.join(lines)
+
+
+class RateLimiter:
+    """Thread-safe token bucket. rate=None or 0 disables limiting."""
+
+    def __init__(self, rate: Optional[float] = RATE_PER_SEC, burst: int = RATE_BURST):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class TranslationEngine:
+    """
+    Runs backend requests concurrently on a bounded thread pool, rate limited
+    and retried with exponential backoff. translate_many() keeps input order.
+    When the backend supports packing, submit_many() and translate_many()
+    deduplicate their texts and coalesce them into as few requests as
+    pack_size allows.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[TranslatorBackend] = None,
+        max_workers: int = MAX_WORKERS,
+        rate_per_sec: Optional[float] = RATE_PER_SEC,
+        burst: int = RATE_BURST,
+        retries: int = RETRIES,
+        backoff: float = BACKOFF_SEC,
+        pack_size: int = PACK_MAX_SIZE
+    ):
+        self.backend = backend or GoogleBackend(pool_size=max_workers)
+        self.pack_size = pack_size if self.backend.supports_packing else 0
+        self.retries = retries
+        self.backoff = backoff
+        self.limiter = RateLimiter(rate_per_sec, burst)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="translate")
+
+    def _translate_one(self, text: str, source: str, target: str) -> str:
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire()
+            try:
+                return self.backend.translate(text, source, target)
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                metrics.count("translate.retries")
+                delay = self.backoff * (2 ** attempt) * (0.5 + random.random())
+                logger.warning(
+                    "%s translate failed (%s), retry %d/%d in %.2fs",
+                    self.backend.name, e, attempt + 1, self.retries, delay
+                )
+                time.sleep(delay)
+
+    def _translate_traced(self, trace, text: str, source: str, target: str) -> str:
+        # pool threads record into the trace of the cycle that submitted the request
+        with metrics.bind(trace), metrics.span("translate.request", chars=len(text)):
+            metrics.count("translate.requests")
+            return self._translate_one(text, source, target)
+
+    def submit(self, text: str, source: str = 'ja', target: str = 'en') -> Future:
+        return self._pool.submit(self._translate_traced, metrics.current(), text, source, target)
+
+    def submit_many(self, texts: List[str], source: str = 'ja', target: str = 'en') -> List[Future]:
+        """
+        One Future per text, in input order. Identical texts share a request
+        and, with packing, texts go out in as few requests as pack_size allows.
+        Every Future completes: with the translation, the request's error,
+        or cancelled when the engine is shut down. Cancelling the Futures
+        drops their request if it has not started yet.
+        """
+        trace = metrics.current()
+        futures: Dict[str, Future] = {t: Future() for t in texts}
+        for group in _pack(list(futures), self.pack_size, self.backend.request_size):
+            if len(group) == 1:
+                self._submit_into([futures[group[0]]], trace, group[0], source, target)
+                continue
+            metrics.count("translate.packed_texts", len(group))
+            packed = self._submit_into(
+                [futures[t] for t in group], trace, PACK_DELIMITER.join(_one_line(t) for t in group), source, target
+            )
+            if packed is not None:
+                packed.add_done_callback(partial(self._unpack, trace, group, futures, source, target))
+        return [futures[t] for t in texts]
+
+    def _submit_into(self, targets: List[Future], trace, text: str, source: str, target: str) -> Optional[Future]:
+        """
+        Submit one request. A single target gets its outcome directly; for
+        several (a packed request) the caller unpacks. If the pool refuses
+        the request (shut down), every target fails with that error.
+        """
+        try:
+            future = self._pool.submit(self._translate_traced, trace, text, source, target)
+        except RuntimeError as e:
+            for t in targets:
+                _set_exception(t, e)
+            return None
+        _cancel_with(future, targets)
+        if len(targets) == 1:
+            _chain(future, targets[0])
+        return future
+
+    def _unpack(self, trace, group: List[str], futures: Dict[str, Future], source: str, target: str, packed: Future):
+        """
+        Split a packed response back per text. If the line count does not match,
+        ask for each text on its own; a failed or cancelled request (its retries
+        already spent) fails every text in it.
+        """
+        targets = [futures[t] for t in group]
+        if not _propagate_failure(packed, targets):
+            return
+        lines = packed.result().split(PACK_DELIMITER)
+        if len(lines) == len(group):
+            for text, line in zip(group, lines):
+                _set_result(futures[text], line.strip())
+            return
+        logger.warning("Packed response has %d lines for %d texts, retrying them one by one", len(lines), len(group))
+        if trace is not None:
+            trace.count("translate.pack_fallbacks")
+        for text in group:
+            self._submit_into([futures[text]], trace, text, source, target)
+
+    def translate_many(self, texts: List[str], source: str = 'ja', target: str = 'en') -> List[str]:
+        """Translate all texts concurrently; failed items come back as ""."""
+        futures = self.submit_many(texts, source, target)
+        results = []
+        for t, future in zip(texts, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logger.error("%s translate error: %s, text=%s", self.backend.name, e, t)
+                results.append("")
+        return results
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self.backend.close()
+
+
+def _one_line(text: str) -> str:
+    # a line break inside a text would shift every later line of the packed response
+    return " ".join(text.split(PACK_DELIMITER))
+
+
+def _pack(texts: List[str], max_size: int, size: Callable[[str], int] = len) -> List[List[str]]:
+    """Greedy, order-preserving groups of texts whose joined size(...) stays within max_size."""
+    if not max_size:
+        return [[t] for t in texts]
+    delimiter = size(PACK_DELIMITER)
+    groups, current, total = [], [], 0
+    for text in texts:
+        extra = size(text) + (delimiter if current else 0)
+        if current and total + extra > max_size:
+            groups.append(current)
+            current, total, extra = [], 0, size(text)
+        current.append(text)
+        total += extra
+    if current:
+        groups.append(current)
+    return groups
+
+
+def _propagate_failure(source: Future, targets: List[Future]) -> bool:
+    """Pass source's cancellation or error on to targets; True when source has a result instead."""
+    if source.cancelled():
+        for t in targets:
+            t.cancel()
+        return False
+    error = source.exception()
+    if error is not None:
+        for t in targets:
+            _set_exception(t, error)
+        return False
+    return True
+
+
+def _set_result(target: Future, value):
+    try:
+        target.set_result(value)
+    except InvalidStateError:
+        pass  # the caller cancelled it
+
+
+def _set_exception(target: Future, error: BaseException):
+    try:
+        target.set_exception(error)
+    except InvalidStateError:
+        pass  # the caller cancelled it
+
+
+def _chain(source: Future, target: Future):
+    """Complete target with source's outcome, including cancellation."""
+    def copy(f: Future):
+        if _propagate_failure(f, [target]):
+            _set_result(target, f.result())
+    source.add_done_callback(copy)
+
+
+def _cancel_with(source: Future, targets: List[Future]):
+    """Cancel the request behind targets, if it has not started, once the caller has cancelled all of them."""
+    def check(_):
+        if all(t.cancelled() for t in targets):
+            source.cancel()
+    for t in targets:
+        t.add_done_callback(check)
@@ -1,19 +1,11 @@
-import tkinter as tk
 import logging
-import os
+import time
+import tkinter as tk
 import cv2
 import numpy as np
+from core.ui_pillow_bubble import clear_bubbles_on_canvas, draw_bubbles_on_canvas
 
-_current_status_win = None
-
-# Logging setup
-log_path = os.path.join(os.path.dirname(__file__), '..', 'app.log')
-logging.basicConfig(
-    filename=log_path,
-    filemode='a',
-    format='%(asctime)s %(levelname)s %(message)s',
-    level=logging.DEBUG
-)
+logger = logging.getLogger(__name__)
 
 def draw_translations(image, data):
     img = image.copy()
@@ -25,88 +17,107 @@ def draw_translations(image, data):
         alpha = 0.6
         img = cv2.addWeighted(overlay, alpha, img, 1-alpha, 0)
         cv2.putText(img, trans, (x1, y1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255,255,255), 2, cv2.LINE_AA)
-        logging.debug(f'Drew overlay: orig={orig}, trans={trans}, box={box}, conf={conf}')
+        logger.debug(f'Drew overlay: orig={orig}, trans={trans}, box={box}, conf={conf}')
     return img
 
-def create_overlay_canvas(window, width, height, fallback_color="white", transparent_color="cyan"):
-    try:
-        window.attributes("-transparentcolor", transparent_color)
-        bg = transparent_color
-    except Exception:
-        bg = fallback_color
-    return tk.Canvas(window, width=width, height=height, bg=bg, highlightthickness=0)
-
-def show_status_overlay(root, region, message, auto_destroy_ms=None):
+class OverlayCompositor:
     """
-    Shows a status line above the capture region.
-    
-    If auto_destroy_ms is set (an integer), the window will self‑destroy
-    after that many milliseconds. If auto_destroy_ms is None, it will stay
-    up indefinitely until you call destroy_status_overlay().
+    Draws everything the overlay shows - capture frame, OCR block outlines
+    and translated bubbles - as items on one persistent canvas, instead of a
+    Toplevel window per block. The status line lives in its own strip above
+    the capture region, so it never ends up in a captured frame.
+    Must be used from the Tk thread.
     """
-    global _current_status_win
-    # kill any previous status window
-    if _current_status_win is not None:
-        try:
-            _current_status_win.destroy()
-        except tk.TclError:
-            pass
-
-    w, _ = region['width'], region['height']
-    status_win = tk.Toplevel(root)
-    status_win.overrideredirect(True)
-    status_win.attributes("-topmost", True)
-    status_win.geometry(f"{w}x30+{region['left']}+{region['top']-40}")
-    try:
-        status_win.attributes("-transparentcolor", "white")
-        bg = 'white'
-        fg = 'black'
-    except tk.TclError:
-        bg = 'black'
-        fg = 'white'
-
-    canvas = tk.Canvas(status_win, width=w, height=30, bg=bg, highlightthickness=0)
-    canvas.pack(fill="both", expand=True)
-    canvas.create_text(w // 2, 15, text=message, fill=fg, font=("Arial", 14, "bold"))
-
-    # only schedule destroy if a duration was given
-    if auto_destroy_ms is not None:
-        status_win.after(auto_destroy_ms, status_win.destroy)
-
-    _current_status_win = status_win
-    return status_win
-
-def show_overlay(root, region, blocks, translations=None, show_translation=True):
-    import textwrap
-    block_rects = []
-
-    for i, block in enumerate(blocks):
-        text, (x1,y1,x2,y2), conf, angle = block
-        w, h = x2 - x1, y2 - y1
-
-        # compute screen coords
-        x_screen = region['left'] + x1
-        y_screen = region['top']  + y1
-
-        rect = tk.Toplevel(root)
-        rect.overrideredirect(True)
-        rect.attributes("-topmost", True)
-        rect.geometry(f"{w}x{h}+{x_screen}+{y_screen}")
-
-        canvas = create_overlay_canvas(rect, w, h)
-        canvas.pack(fill="both", expand=True)
-
-
-
-        block_rects.append(rect)
-    return block_rects
-
-def destroy_status_overlay():
-    """Call this when you want to clear any permanent status."""
-    global _current_status_win
-    if _current_status_win is not None:
+
+    STATUS_HEIGHT = 30
+    STATUS_OFFSET = 40       # strip top, above the region top
+
+    def __init__(self, canvas, region: dict):
+        self.canvas = canvas
+        self.region = region
+        self._outline_items = []
+        self._status_hide_job = None
+        self._render_time = 0.0
+
+        w, h = region['width'], region['height']
+        canvas.create_rectangle(2, 2, w - 2, h - 2, outline="red", width=4, tags=("frame",))
+
+        # one persistent strip window for the status line, shown and hidden rather than recreated
+        self._status_win = tk.Toplevel(canvas.winfo_toplevel())
+        self._status_win.overrideredirect(True)
+        self._status_win.attributes("-topmost", True)
+        status_y = region['top'] - self.STATUS_OFFSET
+        if status_y < 0:
+            status_y = region['top'] + h + self.STATUS_OFFSET - self.STATUS_HEIGHT  # no room above: below it
+        self._status_win.geometry(f"{w}x{self.STATUS_HEIGHT}+{region['left']}+{status_y}")
+        self._status_canvas = tk.Canvas(
+            self._status_win, width=w, height=self.STATUS_HEIGHT, bg="black", highlightthickness=0
+        )
+        self._status_canvas.pack(fill="both", expand=True)
+        self._status_text = self._status_canvas.create_text(
+            w // 2, self.STATUS_HEIGHT // 2, text="", fill="white", font=("Arial", 14, "bold")
+        )
+        self._status_win.withdraw()
+
+    def _timed(self, fn, *args):
+        t0 = time.perf_counter()
         try:
-            _current_status_win.destroy()
-        except tk.TclError:
-            pass
-        _current_status_win = None
\ No newline at end of file
+            return fn(*args)
+        finally:
+            self._render_time += time.perf_counter() - t0
+
+    def take_render_time(self) -> float:
+        """Seconds spent drawing since the last call (i.e. per cycle when called once per cycle)."""
+        elapsed, self._render_time = self._render_time, 0.0
+        return elapsed
+
+    def set_status(self, message: str, auto_hide_ms: int = None):
+        """Update the status line in place; with auto_hide_ms it hides itself after that delay."""
+        self._timed(self._set_status, message, auto_hide_ms)
+
+    def _set_status(self, message, auto_hide_ms):
+        if self._status_hide_job is not None:
+            self.canvas.after_cancel(self._status_hide_job)
+            self._status_hide_job = None
+        self._status_canvas.itemconfigure(self._status_text, text=message)
+        self._status_win.deiconify()
+        if auto_hide_ms is not None:
+            self._status_hide_job = self.canvas.after(auto_hide_ms, self.hide_status)
+
+    def hide_status(self):
+        self._status_hide_job = None
+        self._status_win.withdraw()
+
+    def set_blocks(self, blocks):
+        """Outline each OCR block, reusing existing rectangle items."""
+        self._timed(self._set_blocks, blocks)
+
+    def _set_blocks(self, blocks):
+        boxes = [box for _, box, _, _ in blocks]
+        for i, (x1, y1, x2, y2) in enumerate(boxes):
+            if i < len(self._outline_items):
+                self.canvas.coords(self._outline_items[i], x1, y1, x2, y2)
+            else:
+                self._outline_items.append(self.canvas.create_rectangle(
+                    x1, y1, x2, y2, outline="lime", width=2, dash=(4, 2), tags=("outline",)
+                ))
+        for item in self._outline_items[len(boxes):]:
+            self.canvas.delete(item)
+        del self._outline_items[len(boxes):]
+        self.canvas.tag_lower("outline")
+
+    def set_bubbles(self, blocks, translations):
+        """Show translated bubbles (incremental, see draw_bubbles_on_canvas) above the outlines."""
+        self._timed(self._set_bubbles, blocks, translations)
+
+    def _set_bubbles(self, blocks, translations):
+        draw_bubbles_on_canvas(self.canvas, blocks, translations, self.region)
+        self.canvas.tag_lower("outline")
+
+    def clear(self):
+        """Remove outlines and bubbles; the capture frame and status strip stay."""
+        self._timed(self._clear)
+
+    def _clear(self):
+        self._set_blocks([])
+        clear_bubbles_on_canvas(self.canvas)
@@ -1,27 +1,59 @@
 # core/ui_pillow_bubble.py
 import os
 import textwrap
+from collections import OrderedDict
+from functools import lru_cache
 from PIL import Image, ImageDraw, ImageFont, ImageTk
 import logging
 
+logger = logging.getLogger(__name__)
+
 # Adjust these paths & settings to your taste
 FONT_PATH = "arial.ttf"            # or path to any .ttf you like
 FONT_SIZE = 14
 RADIUS    = 12
 PADDING   = 8  # extra padding inside bubble
 
-# cache Tk PhotoImages to avoid GC
-_photo_cache = {}
+# Translated-bubble style (see make_translated_bubble); part of every cache key
+BUBBLE_FONT_PATH = "arial.ttf"
+BUBBLE_FONT_SIZE = 16
+BUBBLE_RADIUS = 20
+BUBBLE_BORDER = 3
+BUBBLE_LINE_WIDTH = 25   # characters per wrapped line
+BUBBLE_STYLE = (BUBBLE_FONT_PATH, BUBBLE_FONT_SIZE, BUBBLE_RADIUS, BUBBLE_BORDER, BUBBLE_LINE_WIDTH)
+BUBBLE_CACHE_SIZE = 256  # rendered bubbles (and their Tk PhotoImages) kept, LRU
+
+# rendered RGBA bubbles keyed by (translation, width, height, style)
+_bubble_cache: "OrderedDict[tuple, Image.Image]" = OrderedDict()
+# cache Tk PhotoImages to avoid GC, same keys as _bubble_cache
+_photo_cache: "OrderedDict[tuple, ImageTk.PhotoImage]" = OrderedDict()
+
+
+@lru_cache(maxsize=32)
+def get_font(path: str, size: int) -> ImageFont.ImageFont:
+    """Load a TrueType font once per (path, size); falls back to Pillow's default font."""
+    try:
+        return ImageFont.truetype(path, size)
+    except IOError:
+        logger.warning(f"Failed to load {path}, using default font")
+        return ImageFont.load_default()
+
+
+def _lru_get(cache: OrderedDict, key, build):
+    value = cache.get(key)
+    if value is None:
+        value = cache[key] = build()
+        while len(cache) > BUBBLE_CACHE_SIZE:
+            cache.popitem(last=False)
+    else:
+        cache.move_to_end(key)
+    return value
 
 def make_bubble_image(text: str, w: int, h: int) -> Image.Image:
     # Create transparent RGBA image
     im = Image.new("RGBA", (w, h), (0, 0, 0, 0))
     draw = ImageDraw.Draw(im)
-    try:
-        font = ImageFont.truetype(FONT_PATH, FONT_SIZE)
-    except IOError:
-        font = ImageFont.load_default()
-        logging.warning(f"Failed to load {FONT_PATH}, using default font")
+    font = get_font(FONT_PATH, FONT_SIZE)
 
     # Draw rounded rectangle background
     draw.rounded_rectangle(
@@ -62,71 +94,148 @@ def make_bubble_image(text: str, w: int, h: int) -> Image.Image:
     return im
 
 
-from PIL import Image, ImageDraw, ImageFont, ImageTk
-import textwrap
+def bubble_size(box: tuple) -> tuple:
+    x1, y1, x2, y2 = box
+    # Bubble size settings
+    max_width = 220
+    max_height = 120
+    width = min(max_width, max(150, x2 - x1))
+    height = min(max_height, max(60, y2 - y1))
+    return width, height
 
-def draw_bubbles_on_canvas(canvas, blocks, translations, region):
-    canvas_items = []
 
-    if not hasattr(canvas, "images"):
-        canvas.images = []
+def make_translated_bubble(translated: str, box: tuple) -> Image.Image:
+    """
+    Rounded white RGBA bubble with the wrapped translation, sized from the OCR box.
+    Served from an LRU cache; treat the returned image as read-only.
+    """
+    width, height = bubble_size(box)
+    key = (translated, width, height, BUBBLE_STYLE)
+    return _lru_get(_bubble_cache, key, lambda: _render_translated_bubble(translated, width, height))
 
-    canvas.images.clear()
 
-    for (text, (x1, y1, x2, y2), conf, angle), translated in zip(blocks, translations):
-        try:
-            # Bubble size settings
-            max_width = 220
-            max_height = 120
-            width = min(max_width, max(150, x2 - x1))
-            height = min(max_height, max(60, y2 - y1))
-            padding = 10
-
-            # Create transparent image
-            img = Image.new("RGBA", (width, height), (0, 0, 0, 0))
-            draw = ImageDraw.Draw(img)
-
-            # Draw rounded white bubble with black border
-            draw.rounded_rectangle(
-                (0, 0, width, height),
-                radius=20,
-                fill=(255, 255, 255, 240),
-                outline=(0, 0, 0),
-                width=3
-            )
+def _render_translated_bubble(translated: str, width: int, height: int) -> Image.Image:
+    # Create transparent image
+    img = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+
+    # Draw rounded white bubble with black border
+    draw.rounded_rectangle(
+        (0, 0, width, height),
+        radius=BUBBLE_RADIUS,
+        fill=(255, 255, 255, 240),
+        outline=(0, 0, 0),
+        width=BUBBLE_BORDER
+    )
+
+    font = get_font(BUBBLE_FONT_PATH, BUBBLE_FONT_SIZE)
 
-            # Load font
-            try:
-                font = ImageFont.truetype("arial.ttf", 16)
-            except:
-                font = ImageFont.load_default()
+    # Wrap text manually
+    wrapped_text = textwrap.fill(translated, width=BUBBLE_LINE_WIDTH)
+    lines = wrapped_text.split('\n')
 
-            # Wrap text manually
-            line_width = 25
-            wrapped_text = textwrap.fill(translated, width=line_width)
-            lines = wrapped_text.split('\n')
+    # Measure text block height for vertical centering
+    line_height = font.getbbox("A")[3] + 4  # height + line spacing
+    total_text_height = len(lines) * line_height
 
-            # Measure text block height for vertical centering
-            line_height = font.getbbox("A")[3] + 4  # height + line spacing
-            total_text_height = len(lines) * line_height
+    for i, line in enumerate(lines):
+        line_width_px = font.getbbox(line)[2]
+        x = (width - line_width_px) // 2
+        y = (height - total_text_height) // 2 + i * line_height
+        draw.text((x, y), line, fill="black", font=font)
 
-            for i, line in enumerate(lines):
-                line_width_px = font.getbbox(line)[2]
-                x = (width - line_width_px) // 2
-                y = (height - total_text_height) // 2 + i * line_height
-                draw.text((x, y), line, fill="black", font=font)
+    return img
 
-            # Convert to Tk image
-            photo = ImageTk.PhotoImage(img)
-            canvas.images.append(photo)
 
+def draw_bubbles_on_canvas(canvas, blocks, translations, region):
+    """
+    Show one translated bubble per block, updating the canvas incrementally:
+    items whose content and position are unchanged are left alone, others are
+    moved, re-imaged or created, and leftovers deleted. Returns the item ids
+    now on the canvas.
+    """
+    # canvas.bubble_items: [item_id, cache_key, (cx, cy), photo], photo kept referenced while shown
+    current = getattr(canvas, "bubble_items", [])
+
+    desired = []
+    for (text, (x1, y1, x2, y2), conf, angle), translated in zip(blocks, translations):
+        try:
+            width, height = bubble_size((x1, y1, x2, y2))
+            key = (translated, width, height, BUBBLE_STYLE)
+            photo = _lru_get(
+                _photo_cache, key,
+                lambda: ImageTk.PhotoImage(make_translated_bubble(translated, (x1, y1, x2, y2)))
+            )
             # Draw centered
             cx = x1 + (x2 - x1) // 2
             cy = y1 + (y2 - y1) // 2
-            item = canvas.create_image(cx, cy, image=photo, anchor="center")
-            canvas_items.append(item)
+            desired.append((key, (cx, cy), photo))
+        except Exception as e:
+            logger.error(f"[draw_bubbles_on_canvas] Error drawing bubble: {e}")
+
+    unused = list(current)
+    placed = [None] * len(desired)
+    kept = moved = changed = created = 0
+
+    # 1) identical bubble already at the same spot: nothing to do
+    for i, (key, pos, photo) in enumerate(desired):
+        for entry in unused:
+            if entry[1] == key and entry[2] == pos:
+                placed[i] = entry
+                unused.remove(entry)
+                kept += 1
+                break
+
+    # 2) same content elsewhere: move it; 3) otherwise recycle any leftover item or create one
+    for i, (key, pos, photo) in enumerate(desired):
+        if placed[i] is not None:
+            continue
+        entry = next((e for e in unused if e[1] == key), None)
+        if entry is not None:
+            unused.remove(entry)
+            canvas.coords(entry[0], *pos)
+            moved += 1
+        elif unused:
+            entry = unused.pop()
+            canvas.itemconfigure(entry[0], image=photo)
+            canvas.coords(entry[0], *pos)
+            changed += 1
+        else:
+            entry = [canvas.create_image(pos[0], pos[1], image=photo, anchor="center"), key, pos, photo]
+            created += 1
+        entry[1:] = [key, pos, photo]
+        placed[i] = entry
+
+    for entry in unused:
+        canvas.delete(entry[0])
+
+    canvas.bubble_items = placed
+    logger.debug(
+        "Bubble canvas update: kept=%d moved=%d changed=%d created=%d deleted=%d",
+        kept, moved, changed, created, len(unused)
+    )
+    return [entry[0] for entry in placed]
 
+
+def clear_bubbles_on_canvas(canvas):
+    for entry in getattr(canvas, "bubble_items", []):
+        canvas.delete(entry[0])
+    canvas.bubble_items = []
+
+
+def render_bubbles_on_image(image_bgr, blocks, translations) -> Image.Image:
+    """Typeset translations onto a page (BGR array) and return it as an RGB Pillow image."""
+    page = Image.fromarray(image_bgr[:, :, 2::-1]).convert("RGBA")
+
+    for (text, (x1, y1, x2, y2), conf, angle), translated in zip(blocks, translations):
+        if not translated:
+            continue
+        try:
+            bubble = make_translated_bubble(translated, (x1, y1, x2, y2))
+            cx = x1 + (x2 - x1) // 2
+            cy = y1 + (y2 - y1) // 2
+            page.alpha_composite(bubble, (max(0, cx - bubble.width // 2), max(0, cy - bubble.height // 2)))
         except Exception as e:
-            print(f"[draw_bubbles_on_canvas] Error drawing bubble: {e}")
+            logger.error(f"Failed to render bubble at {(x1, y1, x2, y2)}: {e}")
 
-    return canvas_items
+    return page.convert("RGB")
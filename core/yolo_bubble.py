@@ -1,24 +1,65 @@
 # core/yolo_bubble.py
-from ultralytics import YOLO
-import cv2
 import numpy as np
 import logging
+from typing import List, Tuple
+from core import config
+from core.capture import downscale_for_detection
+from core.debug_sink import debug_enabled, debug_image
+from core.detector import get_detector
 
-model = YOLO("models/comic-speech-bubble-detector.pt")  # Adjust path
+logger = logging.getLogger(__name__)
+
+
+def detector_models() -> Tuple[str, ...]:
+    """Model names the configured detector backend needs, e.g. to warm them up."""
+    return get_detector().model_names()
 
-def detect_bubbles(image: np.ndarray) -> list:
-    results = model.predict(image, conf=0.3, iou=0.5, verbose=False)[0]
 
+def _detection_input(image: np.ndarray) -> Tuple[np.ndarray, float]:
+    # the detector letterboxes to DETECT_IMGSZ anyway; shrinking first makes that resize (and its copies) small
+    if not config.DETECT_MULTIRES:
+        return image, 1.0
+    return downscale_for_detection(image, config.DETECT_IMGSZ)
+
+
+def _crop_boxes(image: np.ndarray, boxes: np.ndarray, scale: float = 1.0, debug_prefix: str = "") -> list:
+    """
+    Map detector boxes from the (possibly downscaled) detection input back
+    to `image` and slice each bubble out of it. Crops are views of image.
+    """
+    if scale != 1.0 and len(boxes):
+        h, w = image.shape[:2]
+        boxes = np.asarray(boxes, dtype=np.float64) / scale
+        # round outwards so no glyph edge is lost to the coarser grid
+        boxes = np.concatenate([np.floor(boxes[:, :2]), np.ceil(boxes[:, 2:])], axis=1)
+        boxes = boxes.clip(0, [w, h, w, h])
     crops = []
-    if results.boxes is not None and results.boxes.xyxy is not None:
-        for box in results.boxes.xyxy:
-            x1, y1, x2, y2 = map(int, box)
-            crop = image[y1:y2, x1:x2]
-            crops.append((crop, (x1, y1, x2, y2)))
-            cv2.imwrite("debug/10_final.png", crop)
-            # logging.debug(f"Saved bubble crop: ")
+    save_crops = debug_enabled()
+    for idx, box in enumerate(boxes):
+        x1, y1, x2, y2 = map(int, box)
+        crop = image[y1:y2, x1:x2]
+        crops.append((crop, (x1, y1, x2, y2)))
+        if save_crops:
+            debug_image(f"10_bubble_{debug_prefix}{idx:02d}.png", crop)
     return crops
 
+
+def detect_bubbles(image: np.ndarray) -> list:
+    small, scale = _detection_input(image)
+    return _crop_boxes(image, get_detector().predict(small), scale)
+
+
+def detect_bubbles_batch(images: List[np.ndarray]) -> List[list]:
+    """detect_bubbles for several frames or pages in one detector call."""
+    inputs = [_detection_input(img) for img in images]
+    results = get_detector().predict_batch([small for small, _ in inputs])
+    # debug crops of different images must not overwrite each other
+    batched = len(images) > 1
+    return [
+        _crop_boxes(img, boxes, scale, f"{i}_" if batched else "")
+        for i, (img, (_, scale), boxes) in enumerate(zip(images, inputs, results))
+    ]
+
 def sort_bubbles_for_japanese(bubbles: list) -> list:
     """
     Given a list of (crop, (x1,y1,x2,y2)), return them sorted
@@ -0,0 +1,55 @@
+# history_tool.py
+"""
+Search and export the translation history (history.sqlite3).
+
+    python history_tool.py search 猫 --limit 20
+    python history_tool.py export history.csv
+    python history_tool.py export history.jsonl --query "hello"
+    python history_tool.py thumb 1234 -o bubble.webp
+"""
+import argparse
+import time
+
+from core.history import HISTORY_PATH, HistoryStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=HISTORY_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+    search = sub.add_parser("search", help="newest entries containing the text, in the original or the translation")
+    search.add_argument("query", nargs="?")
+    search.add_argument("--limit", type=int, default=50)
+    export = sub.add_parser("export", help="stream entries to .csv or .jsonl (thumbnails are not exported)")
+    export.add_argument("output")
+    export.add_argument("--query")
+    thumb = sub.add_parser("thumb", help="write an entry's thumbnail image")
+    thumb.add_argument("id", type=int)
+    thumb.add_argument("-o", "--output", required=True)
+    args = parser.parse_args()
+
+    store = HistoryStore(args.db)
+    try:
+        if args.command == "search":
+            for e in store.search(args.query, args.limit):
+                stamp = time.strftime("%Y-%m-%d %H:%M", time.localtime(e["created"]))
+                print(f"{e['id']:>7}  {stamp}  {e['text']}  →  {e['translation']}")
+        elif args.command == "export":
+            t0 = time.perf_counter()
+            if args.output.lower().endswith(".jsonl"):
+                count = store.export_jsonl(args.output, args.query)
+            else:
+                count = store.export_csv(args.output, args.query)
+            print(f"exported {count} entries to {args.output} in {time.perf_counter() - t0:.2f}s")
+        elif args.command == "thumb":
+            data = store.thumbnail(args.id)
+            if not data:
+                parser.error(f"entry {args.id} has no thumbnail")
+            with open(args.output, "wb") as f:
+                f.write(data)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
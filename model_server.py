@@ -0,0 +1,148 @@
+# model_server.py
+"""
+Local model server: keeps the bubble detector and the OCR engine loaded in
+their own process, so they stay warm across app restarts and do not compete
+with Tk and the keyboard hook for the GIL. Any number of clients (the
+overlay's regions, batch_translate.py workers) can connect; their requests
+share one InferenceScheduler, so frames from different clients are batched
+into common model calls.
+
+    python model_server.py                      # listens on MODEL_SERVER, or a local socket/pipe
+    python model_server.py --device cpu
+    python model_server.py --address 127.0.0.1:6010
+
+Then set {"MODEL_SERVER": true} (or the --address given) in config.json,
+or pass --server to batch_translate.py. Clients authenticate with the key
+the server writes to model_server.key on its first run (user-only
+permissions), so they have to run as the same user from the same
+checkout, or set MODEL_SERVER_AUTHKEY on both ends.
+"""
+import argparse
+import itertools
+import logging
+import os
+import socket
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener
+
+from core import config, models
+from core.logger import setup_logger
+from core.model_client import DEFAULT_ADDRESS, attach_shared, load_authkey, parse_address, shared_array
+from core.ocr import ocr_models
+from core.scheduler import InferenceScheduler, SchedulerClient
+from core.yolo_bubble import detector_models
+
+logger = logging.getLogger(__name__)
+
+
+def _close_shared(shm):
+    try:
+        shm.close()
+    except BufferError:
+        # an array still points into it; the mapping goes away with that array
+        logger.debug("Shared block %s still in use, leaving it to GC", shm.name)
+
+
+def _handle(op: str, args: dict, shm, inference: SchedulerClient):
+    if op == "ping":
+        return {"models": detector_models() + ocr_models(), "clients": inference.scheduler.clients()}
+    frame = shared_array(shm, args["frame"]) if args.get("frame") is not None else None
+    if op == "detect":
+        # crops are views of the client's own frame: send the boxes back, not the pixels
+        return [tuple(map(int, box)) for _, box in inference.detect_bubbles(frame)]
+    if op == "ocr":
+        if frame is not None:
+            crops = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in args["boxes"]]
+        else:
+            crops = [shared_array(shm, spec) for spec in args["crops"]]
+        blocks = inference.extract_text_from_bubbles(list(zip(crops, args["boxes"])), args.get("mode"), frame)
+        return [(text, tuple(map(int, box)), float(conf), angle) for text, box, conf, angle in blocks]
+    raise ValueError(f"unknown request {op!r}")
+
+
+def _serve_client(conn, inference: SchedulerClient):
+    shm = None
+    try:
+        while True:
+            try:
+                op, args = conn.recv()
+            except (EOFError, OSError):
+                break
+            try:
+                if "shm" in args and (shm is None or shm.name != args["shm"]):
+                    # the client grew its block: follow it to the new one
+                    if shm is not None:
+                        _close_shared(shm)
+                    shm = attach_shared(args["shm"])
+                reply = ("ok", _handle(op, args, shm, inference))
+            except Exception as e:
+                logger.exception(f"{inference.name}: {op} failed")
+                reply = ("error", f"{type(e).__name__}: {e}")
+            try:
+                conn.send(reply)
+            except (EOFError, OSError):
+                break
+    finally:
+        if shm is not None:
+            _close_shared(shm)
+        conn.close()
+        inference.scheduler.remove_client(inference.name)
+        logger.info(f"{inference.name} disconnected")
+
+
+def _remove_stale_socket(path: str):
+    """A Unix socket left behind by a server that did not exit cleanly blocks the Listener: remove it."""
+    if os.name != "posix" or not os.path.exists(path):
+        return
+    with socket.socket(socket.AF_UNIX) as probe:
+        try:
+            probe.connect(path)
+        except ConnectionRefusedError:
+            os.unlink(path)
+            return
+    raise SystemExit(f"A model server is already listening on {path}")
+
+
+def serve(address, authkey: bytes):
+    address = parse_address(address)
+    if isinstance(address, str):
+        _remove_stale_socket(address)
+    scheduler = InferenceScheduler()
+    scheduler.start()
+    models.warm_up(detector_models() + ocr_models())
+    ids = itertools.count(1)
+    with Listener(address, authkey=authkey) as listener:
+        logger.info(f"Model server listening on {address}")
+        while True:
+            try:
+                conn = listener.accept()
+            except AuthenticationError as e:
+                logger.warning(f"Rejected a client: {e}")
+                continue
+            name = f"client-{next(ids)}"
+            logger.info(f"{name} connected from {listener.last_accepted}")
+            threading.Thread(
+                target=_serve_client, args=(conn, scheduler.client(name)), name=name, daemon=True
+            ).start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--address", default=config.MODEL_SERVER or DEFAULT_ADDRESS,
+                        help="a socket/pipe path, or host:port for TCP")
+    parser.add_argument("--device", help="run every model on this device (\"cpu\"); default comes from core.config")
+    args = parser.parse_args()
+
+    setup_logger()
+    if args.device:
+        config.OCR_DEVICE = args.device
+        config.YOLO_DEVICE = args.device
+    try:
+        serve(args.address, load_authkey(create=True))
+    except KeyboardInterrupt:
+        logger.info("Model server stopped")
+
+
+if __name__ == "__main__":
+    main()
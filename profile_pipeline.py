@@ -0,0 +1,174 @@
+# profile_pipeline.py
+"""
+Headless profiler for the detect → sort → OCR → translate chain over a
+folder of saved page images. No Tk window or live screen needed.
+
+    python profile_pipeline.py pages/ --stub-translator --warmup 1 --iterations 3 --json runs/baseline.json
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import platform
+import time
+
+import cv2
+import numpy as np
+
+from core.logger import setup_logger
+from core import config, models, ocr
+from core.yolo_bubble import detect_bubbles, detector_models, sort_bubbles_for_japanese
+from core.ocr import extract_text_from_bubbles, ocr_models
+from core.preprocess import PROFILE
+from core.translate import set_backend, set_cache, translate_batch
+from core.translation_cache import TranslationCache
+from core.translation_engine import StubBackend
+
+STAGES = ("detect", "sort", "ocr", "translate", "total")
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".webp", ".bmp")
+
+
+def load_pages(folder: str) -> list:
+    paths = sorted(p for p in glob.glob(os.path.join(folder, "*")) if p.lower().endswith(IMAGE_EXTS))
+    pages = []
+    for path in paths:
+        img = cv2.imread(path)
+        if img is None:
+            logging.warning(f"Skipping unreadable image {path}")
+            continue
+        pages.append((os.path.basename(path), img))
+    return pages
+
+
+def run_page(img: np.ndarray) -> dict:
+    """Run the real pipeline chain on one page and time each stage."""
+    t0 = time.perf_counter()
+    bubbles = detect_bubbles(img)
+    t1 = time.perf_counter()
+    bubbles = sort_bubbles_for_japanese(bubbles)
+    t2 = time.perf_counter()
+    blocks = extract_text_from_bubbles(bubbles, frame=img) if bubbles else []
+    t3 = time.perf_counter()
+    translations = translate_batch([b[0] for b in blocks]) if blocks else []
+    t4 = time.perf_counter()
+    return {
+        "detect": t1 - t0,
+        "sort": t2 - t1,
+        "ocr": t3 - t2,
+        "translate": t4 - t3,
+        "total": t4 - t0,
+        "bubbles": len(bubbles),
+        "blocks": len(blocks),
+        "chars": sum(len(b[0]) for b in blocks),
+        "translated": sum(1 for t in translations if t),
+    }
+
+
+def summarize(records: list) -> dict:
+    summary = {}
+    for stage in STAGES:
+        ms = np.array([r[stage] for r in records]) * 1000
+        summary[stage] = {
+            "p50_ms": float(np.percentile(ms, 50)),
+            "p95_ms": float(np.percentile(ms, 95)),
+            "max_ms": float(ms.max()),
+            "mean_ms": float(ms.mean()),
+        }
+    total_s = sum(r["total"] for r in records)
+    summary["pages"] = len(records)
+    summary["bubbles_per_page"] = float(np.mean([r["bubbles"] for r in records]))
+    summary["pages_per_sec"] = len(records) / total_s if total_s else 0.0
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pages", help="folder of page images")
+    parser.add_argument("--iterations", type=int, default=3, help="measured passes over all pages")
+    parser.add_argument("--warmup", type=int, default=1, help="unmeasured passes over the first page")
+    parser.add_argument("--stub-translator", action="store_true", help="offline translator instead of Google")
+    parser.add_argument("--stub-latency", type=float, default=0.0, help="simulated stub round-trip, seconds")
+    parser.add_argument("--translation-cache", choices=("on", "off"), default="off",
+                        help="off (default) measures real translation cost on every pass")
+    parser.add_argument("--ocr-mode", choices=("batch", "rec_only", "per_bubble", "full_page"),
+                        help="override core.ocr.OCR_MODE")
+    parser.add_argument("--json", help="write summary and per-page records to this file")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+
+    setup_logger()
+    logging.getLogger().setLevel(args.log_level.upper())
+
+    if args.ocr_mode:
+        ocr.OCR_MODE = args.ocr_mode
+
+    pages = load_pages(args.pages)
+    if not pages:
+        parser.error(f"no images found in {args.pages}")
+
+    if args.stub_translator:
+        set_backend(StubBackend(latency=args.stub_latency))
+    if args.translation_cache == "off":
+        set_cache(TranslationCache(path=None, memory_entries=0))
+
+    # Cold start: model loading, then the first page with untouched models
+    t0 = time.perf_counter()
+    for name in detector_models() + ocr_models():
+        models.get(name)
+    load_s = time.perf_counter() - t0
+    first = run_page(pages[0][1])
+    cold = {"model_load_ms": load_s * 1000, "first_page_ms": first["total"] * 1000,
+            "time_to_first_result_ms": (load_s + first["total"]) * 1000}
+
+    for _ in range(args.warmup):
+        run_page(pages[0][1])
+
+    records = []
+    for iteration in range(args.iterations):
+        for name, img in pages:
+            record = run_page(img)
+            record.update(page=name, iteration=iteration)
+            records.append(record)
+
+    summary = summarize(records)
+
+    print(f"cold start: load models {cold['model_load_ms']:.0f} ms, first page {cold['first_page_ms']:.0f} ms")
+    print(f"{'stage':<10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for stage in STAGES:
+        s = summary[stage]
+        print(f"{stage:<10}{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}{s['max_ms']:>10.1f}")
+    print(f"{summary['pages']} pages, {summary['bubbles_per_page']:.1f} bubbles/page, "
+          f"{summary['pages_per_sec']:.2f} pages/s")
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        result = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "settings": {
+                "ocr_mode": ocr.OCR_MODE,
+                "preprocess_profile": PROFILE,
+                "ocr_device": config.OCR_DEVICE,
+                "ocr_det_model": config.OCR_DET_MODEL,
+                "ocr_rec_model": config.OCR_REC_MODEL,
+                "yolo_model": config.YOLO_MODEL_PATH,
+                "yolo_device": config.YOLO_DEVICE,
+                "detector_backend": config.DETECTOR_BACKEND,
+                "detect_imgsz": config.DETECT_IMGSZ,
+                "translator": "stub" if args.stub_translator else "google",
+                "translation_cache": args.translation_cache,
+                "warmup": args.warmup,
+                "iterations": args.iterations,
+                "platform": platform.platform(),
+            },
+            "cold_start": cold,
+            "summary": summary,
+            "records": records,
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# tests/test_translation_engine.py
+from concurrent.futures import CancelledError
+
+import pytest
+
+from core.translation_engine import GoogleBackend, StubBackend, TranslationEngine, _pack
+
+
+def make_engine(backend, **kwargs):
+    kwargs.setdefault("pack_size", 500)
+    return TranslationEngine(backend, max_workers=4, rate_per_sec=0, retries=0, backoff=0, **kwargs)
+
+
+def test_pack_keeps_order_within_limit():
+    texts = ["aaaa", "bbbb", "cccc", "dd"]
+    # "aaaa\nbbbb" is 9 characters, a third text would make it 14
+    assert _pack(texts, 10) == [["aaaa", "bbbb"], ["cccc", "dd"]]
+    assert _pack(texts, 0) == [[t] for t in texts]
+    # a text over the limit still goes out, on its own
+    assert _pack(["x" * 20, "y"], 10) == [["x" * 20], ["y"]]
+
+
+def test_google_size_is_encoded_length():
+    backend = GoogleBackend()
+    try:
+        # each Japanese character is 3 UTF-8 bytes, %XX each in the URL
+        assert backend.request_size("こんにちは") == 45
+        assert _pack(["あ" * 10] * 3, 200, backend.request_size) == [["あ" * 10] * 2, ["あ" * 10]]
+    finally:
+        backend.close()
+
+
+def test_packs_and_deduplicates():
+    backend = StubBackend()
+    engine = make_engine(backend)
+    try:
+        texts = ["一", "二", "一", "三", "二"]
+        assert engine.translate_many(texts) == ["[en] 一", "[en] 二", "[en] 一", "[en] 三", "[en] 二"]
+        assert backend.calls == 1
+    finally:
+        engine.shutdown()
+
+
+def test_multiline_text_stays_one_item():
+    backend = StubBackend()
+    engine = make_engine(backend)
+    try:
+        assert engine.translate_many(["上\n下", "横"]) == ["[en] 上 下", "[en] 横"]
+        assert backend.calls == 1
+    finally:
+        engine.shutdown()
+
+
+def test_line_count_mismatch_falls_back_per_text():
+    # the packed call (call 1) comes back merged; the three retries are single texts
+    backend = StubBackend(merge_every=1)
+    engine = make_engine(backend)
+    try:
+        assert engine.translate_many(["一", "二", "三"]) == ["[en] 一", "[en] 二", "[en] 三"]
+        assert backend.calls == 4
+    finally:
+        engine.shutdown()
+
+
+def test_failed_packed_request_fails_every_text():
+    backend = StubBackend(fail_every=1)
+    engine = make_engine(backend)
+    try:
+        futures = engine.submit_many(["一", "二", "三"])
+        for future in futures:
+            with pytest.raises(ConnectionError):
+                future.result(timeout=5)
+        # no per-text retries after the packed request failed
+        assert backend.calls == 1
+        assert engine.translate_many(["四", "五"]) == ["", ""]
+    finally:
+        engine.shutdown()
+
+
+def test_submit_after_shutdown_fails_instead_of_hanging():
+    engine = make_engine(StubBackend())
+    engine.shutdown()
+    for future in engine.submit_many(["一", "二", "二"]):
+        with pytest.raises(RuntimeError):
+            future.result(timeout=5)
+
+
+def test_shutdown_cancels_queued_requests():
+    backend = StubBackend(latency=0.2)
+    engine = TranslationEngine(backend, max_workers=1, rate_per_sec=0, retries=0, pack_size=0)
+    futures = engine.submit_many(["一", "二", "三"])
+    engine.shutdown()
+    assert futures[0].result(timeout=5) == "[en] 一"
+    for future in futures[1:]:
+        with pytest.raises(CancelledError):
+            future.result(timeout=5)
+
+
+def test_cancelled_futures_drop_their_queued_request():
+    backend = StubBackend(latency=0.2)
+    engine = TranslationEngine(backend, max_workers=1, rate_per_sec=0, retries=0, pack_size=0)
+    try:
+        futures = engine.submit_many(["一", "二"])
+        futures[1].cancel()
+        assert futures[0].result(timeout=5) == "[en] 一"
+        engine.submit_many(["三"])[0].result(timeout=5)
+        # "二" never reached the backend
+        assert backend.calls == 2
+    finally:
+        engine.shutdown()